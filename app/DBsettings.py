@@ -1,10 +1,93 @@
 """
 Tortoise ORM 配置模块
 """
+from utils.settings import load_settings
+
+SQLITE_FILE = "Faio.db"
+
+# SQLite 连接参数预设，连接打开时逐条执行 PRAGMA。
+# 在 settings.toml 中选择预设，并可逐项覆盖：
+#
+#     [database]
+#     sqlite_profile = "performance"   # performance / safe / default
+#
+#     [database.sqlite_pragmas]
+#     cache_size = -131072
+SQLITE_PROFILES: dict[str, dict[str, str | int]] = {
+    # Tortoise 自带的默认值（WAL、journal_size_limit、foreign_keys），不做额外调整
+    "default": {},
+    # 每次提交都 fsync，断电也不丢最后一次提交
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    # WAL 下 NORMAL 只在检查点时 fsync，断电最多丢失最近几次提交但不会损坏数据库
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,  # 256 MiB 内存映射读
+        "cache_size": -64 * 1024,  # 负数表示 KiB，即 64 MiB 页缓存
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # 毫秒；其他进程持有写锁时等待而不是立即报 database is locked
+    },
+}
+DEFAULT_SQLITE_PROFILE = "performance"
+
+# 允许通过设置覆盖的 PRAGMA（值会拼进 PRAGMA 语句，因此限定名称并校验取值）
+_ALLOWED_PRAGMAS = {
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "temp_store",
+    "busy_timeout",
+    "journal_size_limit",
+    "wal_autocheckpoint",
+}
+
+
+def _valid_pragma_value(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return True
+    return isinstance(value, str) and value.isalnum()
+
+
+def sqlite_pragmas(profile: str | None = None, overrides: dict | None = None) -> dict[str, str | int]:
+    """
+    计算 SQLite 连接的 PRAGMA：预设 + 覆盖项。
+    未指定时读取 settings.toml 的 [database]；未知预设回退到默认预设，非法覆盖项忽略。
+    """
+    if profile is None or overrides is None:
+        options = load_settings().get("database", {})
+        if not isinstance(options, dict):
+            options = {}
+        if profile is None:
+            profile = str(options.get("sqlite_profile", DEFAULT_SQLITE_PROFILE))
+        if overrides is None:
+            overrides = options.get("sqlite_pragmas", {})
+            if not isinstance(overrides, dict):
+                overrides = {}
+    pragmas = dict(SQLITE_PROFILES.get(profile, SQLITE_PROFILES[DEFAULT_SQLITE_PROFILE]))
+    for name, value in overrides.items():
+        if name in _ALLOWED_PRAGMAS and _valid_pragma_value(value):
+            pragmas[name] = value
+    return pragmas
+
+
+def sqlite_connection(file_path: str = SQLITE_FILE, profile: str | None = None, overrides: dict | None = None) -> dict:
+    """生成 Tortoise 的 SQLite 连接配置；credentials 中除 file_path 以外的项均作为 PRAGMA 执行。"""
+    return {
+        "engine": "tortoise.backends.sqlite",
+        "credentials": {"file_path": file_path, **sqlite_pragmas(profile, overrides)},
+    }
+
 
 TORTOISE_ORM = {
     "connections": {
-        "default": "sqlite://Faio.db"  # 如果还要再接别的库，再写一行即可
+        "default": sqlite_connection()  # 如果还要再接别的库，再写一行即可
     },
     "apps": {
         "models": {
@@ -14,4 +97,4 @@ TORTOISE_ORM = {
     },
     "use_tz": False,        # 是否强制存 UTC；看项目需求
     "timezone": "Asia/Shanghai",  # 本地时区，不配默认系统时区
-}
\ No newline at end of file
+}
@@ -17,16 +17,34 @@ from DBsettings import TORTOISE_ORM  # 数据库配置
 from loguru import logger  # 记录日志
 import os
 
-from db_init import ensure_operator_types, ensure_system_virtual_folders, check_anchor_paths
+from db_init import ensure_operator_types, ensure_system_virtual_folders, upgrade_schema
+from utils.jobs import stop_jobs
+from utils.operation_log import start_log_writer, stop_log_writer, warm_operator_type_cache
+from utils.path_scan import start_validity_scan, stop_validity_scan
+from utils.path_watch import start_path_watcher, stop_path_watcher
+from utils.tag_counts import start_tag_reconciler, stop_tag_reconciler
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """使用 lifespan 取代已弃用的 startup 事件。"""
+    await upgrade_schema()
     await ensure_system_virtual_folders()
     await ensure_operator_types()
-    await check_anchor_paths()
-    yield
+    await warm_operator_type_cache()
+    await start_log_writer()
+    # 路径有效性校验在后台进行，不阻塞服务启动
+    start_validity_scan()
+    await start_path_watcher()
+    start_tag_reconciler()
+    try:
+        yield
+    finally:
+        await stop_jobs()
+        await stop_path_watcher()
+        await stop_validity_scan()
+        await stop_tag_reconciler()
+        await stop_log_writer()
 
 
 # 创建FastAPI应用实例（使用 lifespan）
@@ -45,7 +63,7 @@ app.add_middleware(
 register_tortoise(
     app,
     config=TORTOISE_ORM,
-    generate_schemas=True,  # 启动时自动生成数据库表结构。只在开发环境使用，生产环境请使用迁移工具
+    generate_schemas=False,  # 表结构由 lifespan 中的 upgrade_schema 生成（先补齐旧库字段，再建表/索引）
     add_exception_handlers=True,  # 添加异常处理器。只在开发环境使用。
 )
 
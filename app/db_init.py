@@ -1,7 +1,53 @@
 """
 启动时的数据库初始化辅助函数。
 """
-from pathlib import Path
+
+# 已有数据库的字段升级：模型新增字段时在此登记 (表名, 列名, 列定义)，
+# 启动时若旧库缺少该列则 ALTER TABLE 补齐；新库由 generate_schemas 直接建表。
+SCHEMA_COLUMNS: list[tuple[str, str, str]] = [
+    ("backuprecord", "content_hash", "VARCHAR(64)"),
+    ("backuprecord", "blob_id", 'INT REFERENCES "backupblob" ("id") ON DELETE SET NULL'),
+    ("backuprecord", "file_name", "VARCHAR(255)"),
+    ("backuprecord", "storage", "VARCHAR(16) NOT NULL DEFAULT 'full'"),
+    ("backuprecord", "source_size", "BIGINT"),
+    ("backuprecord", "source_mtime_ns", "BIGINT"),
+    ("backuprecord", "codec", "VARCHAR(16) NOT NULL DEFAULT 'none'"),
+    ("backupblob", "codec", "VARCHAR(16) NOT NULL DEFAULT 'none'"),
+]
+
+# 模型 Meta 无法声明的索引（多对多中间表由 Tortoise 自动生成，只带 (fileanchor_id, 其他表_id) 的唯一索引），
+# 以及旧库建表后新增、generate_schemas 不会补建的索引；启动时以 IF NOT EXISTS 创建，新库旧库一致。
+SCHEMA_INDEXES: list[tuple[str, str, tuple[str, ...]]] = [
+    # 按文件夹/标签反查锚点：WHERE virtualfolder_id = ? / tag_id IN (...)
+    ("idx_fileanchor_virtualfolder_folder", "fileanchor_virtualfolder", ("virtualfolder_id", "fileanchor_id")),
+    ("idx_fileanchor_tag_tag", "fileanchor_tag", ("tag_id", "fileanchor_id")),
+    # 按操作类型过滤日志并按时间范围/倒序分页、计数：WHERE operator_type_id = ? AND time ...
+    ("idx_operatorlog_type_time", "operatorlog", ("operator_type_id", "time")),
+]
+
+
+async def upgrade_schema() -> None:
+    """补齐旧数据库缺失的列，再生成缺失的表与索引（safe 模式，已存在的跳过）、全文检索表与触发器，最后刷新查询规划统计。"""
+    from tortoise import Tortoise, connections
+
+    from utils.anchor_search import ensure_search_index
+    from utils.tag_counts import ensure_tag_count_triggers
+
+    conn = connections.get("default")
+    for table, column, definition in SCHEMA_COLUMNS:
+        rows = await conn.execute_query_dict(f'PRAGMA table_info("{table}")')
+        if rows and column not in {row["name"] for row in rows}:
+            await conn.execute_script(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {definition}')
+
+    await Tortoise.generate_schemas(safe=True)
+
+    for name, table, columns in SCHEMA_INDEXES:
+        cols = ", ".join(f'"{col}"' for col in columns)
+        await conn.execute_script(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})')
+    await ensure_search_index()
+    await ensure_tag_count_triggers()
+    # 只分析统计过时或新建索引的表，开销很小
+    await conn.execute_script("PRAGMA optimize")
 
 
 async def ensure_system_virtual_folders() -> None:
@@ -32,6 +78,8 @@ async def ensure_operator_types() -> None:
         {"name": "重命名虚拟文件夹", "description": "PATCH /folders/{id}"},
         {"name": "删除虚拟文件夹", "description": "DELETE /folders/{id}"},
         {"name": "创建资料锚点", "description": "POST /anchors"},
+        {"name": "批量创建资料锚点", "description": "POST /anchors/bulk"},
+        {"name": "导入目录", "description": "POST /ingest"},
         {"name": "移入回收站", "description": "DELETE /anchors/{id}"},
         {"name": "恢复资料锚点", "description": "POST /anchors/{id}/restore"},
         {"name": "绑定锚点文件夹", "description": "POST /anchors/{id}/bindFolders"},
@@ -43,6 +91,8 @@ async def ensure_operator_types() -> None:
         {"name": "创建备份", "description": "POST /backups/{anchor_id}"},
         {"name": "恢复备份", "description": "POST /backups/{backup_id}/restore"},
         {"name": "删除备份", "description": "DELETE /backups/{backup_id}"},
+        {"name": "批量备份", "description": "POST /backups/folder/{folder_id}, POST /backups/bulk"},
+        {"name": "清理备份", "description": "POST /backups/prune"},
     ]
 
     for item in defaults:
@@ -51,15 +101,3 @@ async def ensure_operator_types() -> None:
             defaults={"description": item["description"]},
         )
 
-
-async def check_anchor_paths() -> None:
-    """启动时校验资料锚点路径有效性，保持 is_valid 状态同步。"""
-    from models import FileAnchor  # 延迟导入，避免循环引用
-
-    anchors = await FileAnchor.all()
-    for anchor in anchors:
-        exists = Path(anchor.path).expanduser().exists()
-        new_valid = bool(exists)
-        if anchor.is_valid != new_valid:
-            anchor.is_valid = new_valid
-            await anchor.save()
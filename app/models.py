@@ -37,7 +37,7 @@ class FileAnchor(Model):
     """    
     id = fields.IntField(pk=True)
     name = fields.CharField(max_length=255)
-    path = fields.CharField(max_length=1024)
+    path = fields.CharField(max_length=1024, db_index=True)  # 按路径查重/导入时跳过已有锚点
     description = fields.TextField(null=True)
     create_time = fields.DatetimeField(auto_now_add=True)
     update_time = fields.DatetimeField(auto_now=True)
@@ -56,7 +56,7 @@ class Tag(Model):
         资料标签
         id: 主键
         name: 标签名称
-        use_count: 使用次数
+        use_count: 使用次数（绑定的锚点数，由 fileanchor_tag 上的触发器维护，见 utils.tag_counts）
         create_time: 创建时间
     """    
     id = fields.IntField(pk=True)
@@ -72,12 +72,69 @@ class BackupRecord(Model):
         file_anchor: 关联的资料文件锚点(外键)
         backup_path: 备份文件的实际路径（示例：D:/Backups/123/原文件-时间戳.ext，或相对于备份根目录的 123/原文件-时间戳.ext）
         backup_time: 备份时间
+        content_hash: 备份内容的 SHA-256（复制时计算，恢复时用于校验；旧记录为空）
+        blob: 内容寻址存储中的备份内容(外键，可空)。为空表示旧版独立副本，此时 backup_path 为该副本路径
+        file_name: 备份版本的展示名称（原文件名-时间戳.扩展名）
+        storage: 存储方式，full 为整文件 blob；delta 为块级增量，此时 blob 为块清单（manifest）
+        source_size / source_mtime_ns: 备份时源文件的大小与修改时间（纳秒），与 content_hash 一起作为文件指纹，
+            增量备份时与当前 stat 比较以跳过未变化的文件
+        codec: 备份内容的压缩方式（none / zlib / lzma），恢复时据此解压
         注：同一个资料锚点可以有多个备份文件，它们是按时间来划分不同版本的备份文件。
+            内容相同的备份共用同一个 BackupBlob，backup_path 指向该 blob 文件。
     """    
     id = fields.IntField(pk=True)
     file_anchor = fields.ForeignKeyField('models.FileAnchor', related_name='backup_records')
     backup_path = fields.CharField(max_length=1024)
-    backup_time = fields.DatetimeField(auto_now_add=True)
+    backup_time = fields.DatetimeField(auto_now_add=True, db_index=True)
+    content_hash = fields.CharField(max_length=64, null=True)
+    blob = fields.ForeignKeyField('models.BackupBlob', related_name='backup_records', null=True, on_delete=fields.SET_NULL)
+    file_name = fields.CharField(max_length=255, null=True)
+    storage = fields.CharField(max_length=16, default="full")
+    source_size = fields.BigIntField(null=True)
+    source_mtime_ns = fields.BigIntField(null=True)
+    codec = fields.CharField(max_length=16, default="none")
+
+    class Meta:
+        # 按锚点查询版本列表、取最近一次备份都走该索引
+        indexes = (("file_anchor_id", "backup_time"),)
+
+
+class BackupBlob(Model):
+    """
+        备份内容（内容寻址存储）
+        id: 主键
+        content_hash: 内容 SHA-256，唯一
+        blob_path: 存储路径（备份根目录/blobs/哈希前两位/哈希）
+        size: 内容字节数
+        ref_count: 引用该内容的备份记录数，归零时删除文件
+        codec: 文件的压缩方式（none / zlib / lzma）；size 始终为未压缩的大小
+        create_time: 创建时间
+    """
+    id = fields.IntField(pk=True)
+    content_hash = fields.CharField(max_length=64, unique=True)
+    blob_path = fields.CharField(max_length=1024)
+    size = fields.BigIntField(default=0, db_index=True)
+    ref_count = fields.IntField(default=0)
+    codec = fields.CharField(max_length=16, default="none")
+    create_time = fields.DatetimeField(auto_now_add=True)
+
+
+class BackupChunk(Model):
+    """
+        增量备份的数据块（内容寻址存储）
+        id: 主键
+        content_hash: 块内容 SHA-256，唯一
+        chunk_path: 存储路径（备份根目录/chunks/哈希前两位/哈希）
+        size: 块字节数
+        ref_count: 引用该块的块清单数，归零时删除文件
+        create_time: 创建时间
+    """
+    id = fields.IntField(pk=True)
+    content_hash = fields.CharField(max_length=64, unique=True)
+    chunk_path = fields.CharField(max_length=1024)
+    size = fields.IntField(default=0)
+    ref_count = fields.IntField(default=0)
+    create_time = fields.DatetimeField(auto_now_add=True)
 
 class OperatorLog(Model):
     """
@@ -90,7 +147,7 @@ class OperatorLog(Model):
     id = fields.IntField(pk=True)
     operator_type = fields.ForeignKeyField('models.OperatorType', related_name='operator_logs')
     result = fields.TextField()
-    time = fields.DatetimeField(auto_now_add=True)
+    time = fields.DatetimeField(auto_now_add=True, db_index=True)  # 日志按时间倒序分页/范围过滤
 
 class OperatorType(Model):
     """
@@ -1,10 +1,22 @@
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict, Field
+from tortoise.transactions import in_transaction
 
 from models import FileAnchor, Tag, VirtualFolder
+from utils.anchor_bulk import (
+    add_anchor_folders,
+    add_anchor_tags,
+    anchors_in_folder,
+    recycle_anchors,
+    replace_anchor_folders,
+)
+from utils.anchor_import import insert_anchors
+from utils.anchor_relations import load_anchor_relations
+from utils.anchor_search import search_anchor_ids
 from utils.operation_log import log_operation
+from utils.path_watch import get_watcher
 
 
 router = APIRouter(prefix="/anchors", tags=["file-anchors"])
@@ -21,6 +33,41 @@ class AnchorCreate(BaseModel):
     folder_id: int = Field(..., description="锚点所属的实际虚拟文件夹（不可为“全部资料”）")
 
 
+class AnchorBulkItem(BaseModel):
+    """批量创建中的单个锚点。"""
+
+    name: str = Field(..., min_length=1, max_length=255)
+    path: str = Field(..., min_length=1, max_length=1024)
+    description: str | None = Field(default=None)
+
+
+class AnchorBulkCreate(BaseModel):
+    """请求体：批量创建资料锚点（如文件选择框多选的结果），全部放入同一个虚拟文件夹。"""
+
+    folder_id: int = Field(..., description="锚点所属的实际虚拟文件夹（不可为“全部资料”）")
+    items: list[AnchorBulkItem] = Field(..., min_length=1, max_length=20000)
+
+
+class AnchorBulkIds(BaseModel):
+    """请求体：按锚点 ID 列表批量操作。"""
+
+    anchor_ids: list[int] = Field(..., min_length=1, max_length=20000)
+
+
+class AnchorBulkBindFolders(AnchorBulkIds):
+    """请求体：为多个锚点追加绑定同一组虚拟文件夹。"""
+
+    folder_ids: list[int] = Field(..., min_length=1, description="待绑定的虚拟文件夹 ID 列表（不可包含系统/全部/回收站）")
+
+
+class AnchorBulkResult(BaseModel):
+    """响应体：批量操作结果。updated 为已处理的锚点，missing 为不存在的 ID，skipped 为状态不符而跳过的锚点。"""
+
+    updated: list[int]
+    missing: list[int] = []
+    skipped: list[int] = []
+
+
 class AnchorResponse(BaseModel):
     """响应体：资料锚点基础信息。"""
 
@@ -37,6 +84,94 @@ class AnchorResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AnchorPageResponse(BaseModel):
+    """响应体：游标分页的资料锚点列表。next_cursor 为空表示已到最后一页。"""
+
+    items: list[AnchorResponse]
+    next_cursor: str | None = None
+
+
+def _to_response(anchor: FileAnchor, folder_ids: list[int], tag_ids: list[int]) -> AnchorResponse:
+    return AnchorResponse(
+        id=anchor.id,
+        name=anchor.name,
+        path=anchor.path,
+        description=anchor.description,
+        is_valid=anchor.is_valid,
+        create_time=anchor.create_time,
+        update_time=anchor.update_time,
+        virtual_folder_ids=folder_ids,
+        tag_ids=tag_ids,
+    )
+
+
+async def build_anchor_responses(anchors: list[FileAnchor]) -> list[AnchorResponse]:
+    """
+    批量组装锚点响应：一次性加载整页锚点的文件夹/标签关联，查询次数与锚点数量无关。
+    """
+    folder_map, tag_map = await load_anchor_relations(a.id for a in anchors)
+    return [_to_response(a, folder_map.get(a.id, []), tag_map.get(a.id, [])) for a in anchors]
+
+
+async def build_anchor_response(anchor: FileAnchor) -> AnchorResponse:
+    """组装单个锚点的响应。"""
+    return (await build_anchor_responses([anchor]))[0]
+
+
+async def _split_existing(anchor_ids: list[int]) -> tuple[list[int], list[int]]:
+    """去重后拆分为 (存在的锚点 ID, 不存在的 ID)，保持请求顺序。"""
+    ids = list(dict.fromkeys(anchor_ids))
+    found: set[int] = set()
+    for start in range(0, len(ids), 900):
+        found.update(await FileAnchor.filter(id__in=ids[start:start + 900]).values_list("id", flat=True))
+    return [i for i in ids if i in found], [i for i in ids if i not in found]
+
+
+def _ids_summary(ids: list[int], limit: int = 50) -> str:
+    """操作日志中的锚点 ID 列表，过长时截断。"""
+    text = ",".join(map(str, ids[:limit]))
+    return text + ",..." if len(ids) > limit else text
+
+
+async def _get_system_folder(name: str) -> VirtualFolder:
+    """获取系统文件夹（“全部资料”/“回收站”），不存在时创建。"""
+    folder, _ = await VirtualFolder.get_or_create(
+        name=name,
+        defaults={"description": "系统默认文件夹", "is_system": True},
+    )
+    return folder
+
+
+async def _get_bind_targets(folder_ids: list[int]) -> list[VirtualFolder]:
+    """
+    校验待绑定的虚拟文件夹。
+    - 有不存在的文件夹返回 404；包含系统文件夹/“全部资料”/“回收站”返回 400。
+    """
+    folder_ids = list(dict.fromkeys(folder_ids))
+    targets = await VirtualFolder.filter(id__in=folder_ids)
+    if len(targets) != len(folder_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="部分虚拟文件夹不存在")
+
+    invalid_targets = [f.name for f in targets if f.is_system or f.name in (ALL_FOLDER_NAME, RECYCLE_FOLDER_NAME)]
+    if invalid_targets:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不可绑定系统文件夹: {', '.join(invalid_targets)}")
+    return targets
+
+
+async def get_target_folders(folder_id: int) -> tuple[VirtualFolder, VirtualFolder]:
+    """
+    校验新建锚点的目标文件夹，返回 (目标文件夹, “全部资料”)。
+    - 目标文件夹不存在返回 404；为“全部资料”或系统文件夹返回 400。
+    """
+    target_folder = await VirtualFolder.filter(id=folder_id).first()
+    if not target_folder:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="虚拟文件夹不存在")
+    if target_folder.name == ALL_FOLDER_NAME or target_folder.is_system:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不能在“全部资料”或系统文件夹下直接创建锚点")
+
+    return target_folder, await _get_system_folder(ALL_FOLDER_NAME)
+
+
 @router.post("/", response_model=AnchorResponse, status_code=status.HTTP_201_CREATED)
 async def create_anchor(payload: AnchorCreate) -> AnchorResponse:
     """
@@ -45,16 +180,7 @@ async def create_anchor(payload: AnchorCreate) -> AnchorResponse:
     - 创建时不携带标签，标签需后续单独绑定。
     - 若指定的虚拟文件夹不存在，返回 404。
     """
-    target_folder = await VirtualFolder.filter(id=payload.folder_id).first()
-    if not target_folder:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="虚拟文件夹不存在")
-    if target_folder.name == ALL_FOLDER_NAME or target_folder.is_system:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="不能在“全部资料”或系统文件夹下直接创建锚点")
-
-    all_folder, _ = await VirtualFolder.get_or_create(
-        name=ALL_FOLDER_NAME,
-        defaults={"description": "系统默认文件夹", "is_system": True},
-    )
+    target_folder, all_folder = await get_target_folders(payload.folder_id)
 
     anchor = await FileAnchor.create(
         name=payload.name,
@@ -70,17 +196,130 @@ async def create_anchor(payload: AnchorCreate) -> AnchorResponse:
 
     await log_operation("创建资料锚点", f"anchor_id={anchor.id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=bound_folder_ids,
-        tag_ids=[],
-    )
+    return _to_response(anchor, bound_folder_ids, [])
+
+
+@router.post("/bulk", response_model=list[AnchorResponse], status_code=status.HTTP_201_CREATED)
+async def create_anchors_bulk(payload: AnchorBulkCreate) -> list[AnchorResponse]:
+    """
+    批量创建资料锚点（文件选择框多选导入）。
+    - 目标文件夹只校验一次，规则与 POST /anchors 相同。
+    - 锚点与“全部资料”/目标文件夹的关联在同一个事务中批量写入，任一失败则全部回滚。
+    - 只写一条汇总操作日志。
+    """
+    target_folder, all_folder = await get_target_folders(payload.folder_id)
+    folder_ids = [all_folder.id, target_folder.id]
+
+    anchors = [
+        FileAnchor(name=item.name, path=item.path, description=item.description or "暂无描述")
+        for item in payload.items
+    ]
+    async with in_transaction() as conn:
+        ids = await insert_anchors(conn, anchors, folder_ids)
+    # 批量插入不触发 ORM 信号，提交后显式登记路径监听
+    watcher = get_watcher()
+    if watcher is not None:
+        watcher.watch_anchors((anchor.id, anchor.path) for anchor in anchors)
+
+    await log_operation("批量创建资料锚点", f"folder_id={target_folder.id};count={len(ids)};anchor_ids={ids[0]}-{ids[-1]}")
+
+    return [_to_response(anchor, folder_ids, []) for anchor in anchors]
+
+
+@router.post("/bulk/recycle", response_model=AnchorBulkResult)
+async def move_anchors_to_recycle(payload: AnchorBulkIds) -> AnchorBulkResult:
+    """
+    批量移入回收站：在一个事务中整批解除标签、文件夹绑定只保留回收站。
+    - 已在回收站的锚点跳过。
+    """
+    ids, missing = await _split_existing(payload.anchor_ids)
+    recycle_folder = await _get_system_folder(RECYCLE_FOLDER_NAME)
+
+    async with in_transaction() as conn:
+        recycled = await anchors_in_folder(conn, ids, recycle_folder.id)
+        updated = [i for i in ids if i not in recycled]
+        await recycle_anchors(conn, updated, recycle_folder.id)
+
+    if updated:
+        await log_operation("移入回收站", f"count={len(updated)};anchor_ids={_ids_summary(updated)}")
+    return AnchorBulkResult(updated=updated, missing=missing, skipped=[i for i in ids if i in recycled])
+
+
+@router.post("/bulk/restore", response_model=AnchorBulkResult)
+async def restore_anchors(payload: AnchorBulkIds) -> AnchorBulkResult:
+    """
+    批量从回收站恢复：恢复后仅绑定“全部资料”，标签保持为空。
+    - 不在回收站的锚点跳过。
+    """
+    ids, missing = await _split_existing(payload.anchor_ids)
+    recycle_folder = await _get_system_folder(RECYCLE_FOLDER_NAME)
+    all_folder = await _get_system_folder(ALL_FOLDER_NAME)
+
+    async with in_transaction() as conn:
+        recycled = await anchors_in_folder(conn, ids, recycle_folder.id)
+        updated = [i for i in ids if i in recycled]
+        await replace_anchor_folders(conn, updated, [all_folder.id])
+
+    if updated:
+        await log_operation("恢复资料锚点", f"count={len(updated)};anchor_ids={_ids_summary(updated)}")
+    return AnchorBulkResult(updated=updated, missing=missing, skipped=[i for i in ids if i not in recycled])
+
+
+@router.post("/bulk/bindFolders", response_model=AnchorBulkResult)
+async def bind_anchors_folders(payload: AnchorBulkBindFolders) -> AnchorBulkResult:
+    """
+    为多个锚点追加绑定虚拟文件夹（不移除已有绑定，已绑定的忽略），规则同单个绑定。
+    - 在回收站中的锚点跳过。
+    """
+    targets = await _get_bind_targets(payload.folder_ids)
+    ids, missing = await _split_existing(payload.anchor_ids)
+    recycle_folder = await _get_system_folder(RECYCLE_FOLDER_NAME)
+    all_folder = await _get_system_folder(ALL_FOLDER_NAME)
+    folder_ids = [all_folder.id, *(f.id for f in targets)]
+
+    async with in_transaction() as conn:
+        recycled = await anchors_in_folder(conn, ids, recycle_folder.id)
+        updated = [i for i in ids if i not in recycled]
+        await add_anchor_folders(conn, updated, folder_ids)
+
+    if updated:
+        await log_operation(
+            "绑定锚点文件夹",
+            f"count={len(updated)};anchor_ids={_ids_summary(updated)};folders={','.join(map(str, folder_ids))}",
+        )
+    return AnchorBulkResult(updated=updated, missing=missing, skipped=[i for i in ids if i in recycled])
+
+
+@router.get("/search", response_model=list[AnchorResponse])
+async def search_anchors(
+    q: str = Query(
+        ...,
+        min_length=1,
+        max_length=255,
+        description="关键词，多个以空格分隔（需全部命中）；每个关键词至少 3 个字符时走全文索引，更短的关键词（如两个汉字）为逐行匹配，较慢",
+    ),
+    limit: int = Query(default=20, ge=1, le=200, description="返回前 k 个结果"),
+    folder_id: int | None = Query(default=None, description="仅检索该虚拟文件夹下的锚点"),
+    tag_id: list[int] | None = Query(default=None, description="仅检索同时带有这些标签的锚点，可重复传参"),
+    include_recycled: bool = Query(default=False, description="是否包含回收站中的锚点"),
+) -> list[AnchorResponse]:
+    """
+    按名称、描述、路径全文检索资料锚点，结果按相关度排序（名称命中优先）。
+    - 关键词按子串匹配，不区分大小写，支持中文。
+    - 全文索引按连续 3 个字符建立：全部关键词都不足 3 个字符（如“合同”）时无法使用索引，
+      退化为逐行匹配，耗时随锚点数增长，结果只按名称命中优先、新建优先排序。
+      建议输入 3 个字符以上的关键词，或与长关键词组合使用（短词只在长词命中的结果中过滤，仍然很快）。
+    - 默认不返回回收站中的锚点；指定 folder_id 为回收站时始终检索回收站。
+    """
+    recycle_folder_id = None
+    if not include_recycled:
+        recycle_folder = await VirtualFolder.filter(name=RECYCLE_FOLDER_NAME).first()
+        if recycle_folder and recycle_folder.id != folder_id:
+            recycle_folder_id = recycle_folder.id
+
+    ids = await search_anchor_ids(q, limit, folder_id, tag_id, recycle_folder_id)
+    anchors = {a.id: a for a in await FileAnchor.filter(id__in=ids)}
+    return await build_anchor_responses([anchors[i] for i in ids if i in anchors])
 
 
 @router.delete("/{anchor_id}", response_model=AnchorResponse)
@@ -94,36 +333,15 @@ async def move_anchor_to_recycle(anchor_id: int) -> AnchorResponse:
     if not anchor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="资料锚点不存在")
 
-    recycle_folder, _ = await VirtualFolder.get_or_create(
-        name=RECYCLE_FOLDER_NAME,
-        defaults={"description": "系统默认文件夹", "is_system": True},
-    )
-
-    # 解绑标签并回收 use_count
-    tags = await anchor.tags.all()
-    for tag in tags:
-        if tag.use_count > 0:
-            tag.use_count -= 1
-            await tag.save()
+    recycle_folder = await _get_system_folder(RECYCLE_FOLDER_NAME)
 
-    await anchor.virtual_folders.clear()
-    await anchor.virtual_folders.add(recycle_folder)
-    await anchor.tags.clear()
-    await anchor.refresh_from_db()
+    # 解绑标签，文件夹绑定只保留回收站
+    async with in_transaction() as conn:
+        await recycle_anchors(conn, [anchor.id], recycle_folder.id)
 
     await log_operation("移入回收站", f"anchor_id={anchor.id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=[recycle_folder.id],
-        tag_ids=[],
-    )
+    return _to_response(anchor, [recycle_folder.id], [])
 
 
 @router.post("/{anchor_id}/restore", response_model=AnchorResponse)
@@ -137,36 +355,19 @@ async def restore_anchor(anchor_id: int) -> AnchorResponse:
     if not anchor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="资料锚点不存在")
 
-    recycle_folder, _ = await VirtualFolder.get_or_create(
-        name=RECYCLE_FOLDER_NAME,
-        defaults={"description": "系统默认文件夹", "is_system": True},
-    )
+    recycle_folder = await _get_system_folder(RECYCLE_FOLDER_NAME)
     in_recycle = await anchor.virtual_folders.filter(id=recycle_folder.id).exists()
     if not in_recycle:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="锚点不在回收站")
 
-    all_folder, _ = await VirtualFolder.get_or_create(
-        name=ALL_FOLDER_NAME,
-        defaults={"description": "系统默认文件夹", "is_system": True},
-    )
+    all_folder = await _get_system_folder(ALL_FOLDER_NAME)
 
-    await anchor.virtual_folders.clear()
-    await anchor.virtual_folders.add(all_folder)
-    await anchor.refresh_from_db()
+    async with in_transaction() as conn:
+        await replace_anchor_folders(conn, [anchor.id], [all_folder.id])
 
     await log_operation("恢复资料锚点", f"anchor_id={anchor.id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=[all_folder.id],
-        tag_ids=[],
-    )
+    return _to_response(anchor, [all_folder.id], [])
 
 
 class AnchorBindFolders(BaseModel):
@@ -190,42 +391,18 @@ async def bind_anchor_folders(anchor_id: int, payload: AnchorBindFolders) -> Anc
     if recycle_folder and await anchor.virtual_folders.filter(id=recycle_folder.id).exists():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="锚点在回收站，需先恢复后再绑定文件夹")
 
-    folder_ids = list(dict.fromkeys(payload.folder_ids))
-    targets = await VirtualFolder.filter(id__in=folder_ids)
-    if len(targets) != len(folder_ids):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="部分虚拟文件夹不存在")
-
-    invalid_targets = [f.name for f in targets if f.is_system or f.name in (ALL_FOLDER_NAME, RECYCLE_FOLDER_NAME)]
-    if invalid_targets:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不可绑定系统文件夹: {', '.join(invalid_targets)}")
-
-    all_folder, _ = await VirtualFolder.get_or_create(
-        name=ALL_FOLDER_NAME,
-        defaults={"description": "系统默认文件夹", "is_system": True},
-    )
+    targets = await _get_bind_targets(payload.folder_ids)
+    all_folder = await _get_system_folder(ALL_FOLDER_NAME)
 
-    await anchor.virtual_folders.add(*targets)
-    # 确保仍绑定“全部资料”
-    if not await anchor.virtual_folders.filter(id=all_folder.id).exists():
-        await anchor.virtual_folders.add(all_folder)
+    # 同时确保仍绑定“全部资料”
+    async with in_transaction() as conn:
+        await add_anchor_folders(conn, [anchor.id], [all_folder.id, *(f.id for f in targets)])
 
-    await anchor.refresh_from_db()
-    bound_folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
-    tag_ids = await anchor.tags.all().values_list("id", flat=True)
+    response = await build_anchor_response(anchor)
 
-    await log_operation("绑定锚点文件夹", f"anchor_id={anchor.id};folders={','.join(map(str, bound_folder_ids))}")
+    await log_operation("绑定锚点文件夹", f"anchor_id={anchor.id};folders={','.join(map(str, response.virtual_folder_ids))}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=list(bound_folder_ids),
-        tag_ids=list(tag_ids),
-    )
+    return response
 
 
 class AnchorUpdate(BaseModel):
@@ -270,22 +447,11 @@ async def update_anchor(anchor_id: int, payload: AnchorUpdate) -> AnchorResponse
     await anchor.save()
     await anchor.refresh_from_db()
 
-    folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
-    tag_ids = await anchor.tags.all().values_list("id", flat=True)
+    response = await build_anchor_response(anchor)
 
     await log_operation("更新锚点信息", f"anchor_id={anchor.id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=list(folder_ids),
-        tag_ids=list(tag_ids),
-    )
+    return response
 
 
 @router.patch("/{anchor_id}/name", response_model=AnchorResponse)
@@ -301,22 +467,11 @@ async def rename_anchor(anchor_id: int, payload: AnchorRename) -> AnchorResponse
     await anchor.save()
     await anchor.refresh_from_db()
 
-    folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
-    tag_ids = await anchor.tags.all().values_list("id", flat=True)
+    response = await build_anchor_response(anchor)
 
     await log_operation("更新锚点信息", f"anchor_id={anchor.id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=list(folder_ids),
-        tag_ids=list(tag_ids),
-    )
+    return response
 
 
 @router.patch("/{anchor_id}/description", response_model=AnchorResponse)
@@ -332,22 +487,11 @@ async def update_anchor_description(anchor_id: int, payload: AnchorUpdateDescrip
     await anchor.save()
     await anchor.refresh_from_db()
 
-    folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
-    tag_ids = await anchor.tags.all().values_list("id", flat=True)
+    response = await build_anchor_response(anchor)
 
     await log_operation("更新锚点信息", f"anchor_id={anchor.id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=list(folder_ids),
-        tag_ids=list(tag_ids),
-    )
+    return response
 
 # --------------资料锚点与标签相关操作--------------
 @router.post("/{anchor_id}/tags", response_model=AnchorResponse, status_code=status.HTTP_201_CREATED)
@@ -365,50 +509,24 @@ async def add_tags_to_anchor(anchor_id: int, payload: AnchorAddTags) -> AnchorRe
     if not names:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="标签名称不能为空")
 
-    existing_tags = await anchor.tags.all().values_list("id", flat=True)
-    existing_tag_ids = set(existing_tags)
-
-    existing = await Tag.filter(name__in=names)
-    existing_map = {t.name: t for t in existing}
-
-    to_create = [n for n in names if n not in existing_map]
-    created: list[Tag] = []
-    for name in to_create:
-        tag = await Tag.create(name=name)
-        created.append(tag)
+    # 并发请求可能同时创建同名标签或重复绑定，均以 INSERT OR IGNORE 写入；
+    # use_count 由触发器随实际插入的绑定同步加 1
+    async with in_transaction() as conn:
+        await Tag.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True, using_db=conn)
+        tag_ids = await Tag.filter(name__in=names).using_db(conn).values_list("id", flat=True)
+        await add_anchor_tags(conn, [anchor.id], list(tag_ids))
 
-    to_bind = [tag for tag in list(existing_map.values()) + created if tag.id not in existing_tag_ids]
-
-    if to_bind:
-        await anchor.tags.add(*to_bind)
-        for tag in to_bind:
-            tag.use_count += 1
-            await tag.save()
-
-    await anchor.refresh_from_db()
+    response = await build_anchor_response(anchor)
 
-    tag_ids = await anchor.tags.all().values_list("id", flat=True)
-    folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
+    await log_operation("添加锚点标签", f"anchor_id={anchor.id};tags={','.join(map(str, response.tag_ids))}")
 
-    await log_operation("添加锚点标签", f"anchor_id={anchor.id};tags={','.join(map(str, tag_ids))}")
-
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=list(folder_ids),
-        tag_ids=list(tag_ids),
-    )
+    return response
 
 
 @router.delete("/{anchor_id}/tags/{tag_id}", response_model=AnchorResponse)
 async def remove_tag_from_anchor(anchor_id: int, tag_id: int) -> AnchorResponse:
     """
-    从资料锚点解除指定标签绑定，并将标签 use_count 减 1（不低于 0）。
+    从资料锚点解除指定标签绑定（标签 use_count 由触发器同步减 1）。
     """
     anchor = await FileAnchor.filter(id=anchor_id).first()
     if not anchor:
@@ -423,27 +541,13 @@ async def remove_tag_from_anchor(anchor_id: int, tag_id: int) -> AnchorResponse:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="锚点未绑定该标签")
 
     await anchor.tags.remove(tag)
-    if tag.use_count > 0:
-        tag.use_count -= 1
-        await tag.save()
 
     await anchor.refresh_from_db()
 
-    tag_ids = await anchor.tags.all().values_list("id", flat=True)
-    folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
+    response = await build_anchor_response(anchor)
 
     await log_operation("移除锚点标签", f"anchor_id={anchor.id};tag_id={tag_id}")
 
-    return AnchorResponse(
-        id=anchor.id,
-        name=anchor.name,
-        path=anchor.path,
-        description=anchor.description,
-        is_valid=anchor.is_valid,
-        create_time=anchor.create_time,
-        update_time=anchor.update_time,
-        virtual_folder_ids=list(folder_ids),
-        tag_ids=list(tag_ids),
-    )
+    return response
 
 # --------------资料锚点备份相关操作--------------
@@ -1,37 +1,33 @@
 from __future__ import annotations
 
-import os
-import shutil
-import time
+from dataclasses import asdict
+from datetime import datetime
 from pathlib import Path
-from typing import List
-
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
-
-from models import BackupRecord, FileAnchor
+from typing import List, Literal
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel, Field
+from tortoise.expressions import Q
+from tortoise.functions import Count, Max, Sum
+
+from models import BackupRecord, FileAnchor, VirtualFolder
+from utils.backup_codec import load_compression_options
+from utils.backup_jobs import load_backup_job_options, run_backup_job
+from utils.backup_retention import RetentionPolicy, load_retention_policy, prune_backups
+from utils.backup_store import BackupIntegrityError, create_backup, release_backups, restore_backup_content
+from utils.jobs import Job, cancel_job, get_job, list_jobs, start_job
 from utils.operation_log import log_operation
+from utils.pagination import decode_cursor, encode_cursor
+from utils.settings import load_settings
 
 
 router = APIRouter(prefix="/backups", tags=["backups"])
-
-
-def _settings_file() -> Path:
-    root = Path(os.getenv("LOCALAPPDATA", Path.home())) / "FAIO_Data"
-    root.mkdir(parents=True, exist_ok=True)
-    return root / "settings.toml"
+BACKUP_JOB_KIND = "backup"
+RECYCLE_FOLDER_NAME = "回收站"
 
 
 def _load_backup_dir() -> Path:
-    path = _settings_file()
-    if not path.exists():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="备份路径未配置")
-    try:
-        import tomllib
-    except ImportError as exc:  # pragma: no cover - 仅防御
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc))
-    data = tomllib.loads(path.read_text(encoding="utf-8"))
-    backup_path = data.get("backup_path")
+    backup_path = load_settings().get("backup_path")
     if not backup_path:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="备份路径未配置")
     return Path(backup_path)
@@ -44,6 +40,12 @@ class BackupRecordResponse(BaseModel):
     file_anchor_path: str
     backup_path: str
     backup_time: str
+    content_hash: str | None = None
+    file_name: str
+    storage: str = "full"
+    source_size: int | None = None
+    source_mtime_ns: int | None = None
+    codec: str = "none"
 
     @classmethod
     def from_model(cls, rec: BackupRecord) -> "BackupRecordResponse":
@@ -55,13 +57,99 @@ class BackupRecordResponse(BaseModel):
             file_anchor_path=anchor.path,
             backup_path=rec.backup_path,
             backup_time=rec.backup_time.isoformat() if rec.backup_time else "",
+            content_hash=rec.content_hash,
+            file_name=rec.file_name or Path(rec.backup_path).name,
+            storage=rec.storage or "full",
+            source_size=rec.source_size,
+            source_mtime_ns=rec.source_mtime_ns,
+            codec=rec.codec or "none",
         )
 
 
-@router.get("/", response_model=List[BackupRecordResponse])
-async def list_backups() -> List[BackupRecordResponse]:
-    records = await BackupRecord.all().prefetch_related("file_anchor").order_by("-backup_time")
-    return [BackupRecordResponse.from_model(rec) for rec in records]
+class BackupRecordPageResponse(BaseModel):
+    """响应体：游标分页的备份记录。"""
+
+    items: List[BackupRecordResponse]
+    next_cursor: str | None = None
+
+
+class BackupSummaryResponse(BaseModel):
+    """响应体：单个资料锚点的备份汇总。total_bytes 为各版本源文件大小之和（旧记录无大小，不计入）。"""
+
+    file_anchor_id: int
+    backup_count: int
+    latest_backup_time: datetime | None = None
+    total_bytes: int
+
+
+@router.get("/", response_model=BackupRecordPageResponse)
+async def list_backups(
+    limit: int = Query(default=100, ge=1, le=1000, description="每页数量"),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor"),
+    anchor_id: int | None = Query(default=None, description="按资料锚点过滤"),
+    start_time: datetime | None = Query(default=None, description="备份时间起（含）"),
+    end_time: datetime | None = Query(default=None, description="备份时间止（含）"),
+    min_size: int | None = Query(default=None, ge=0, description="源文件最小字节数（含）"),
+    max_size: int | None = Query(default=None, ge=0, description="源文件最大字节数（含）"),
+) -> BackupRecordPageResponse:
+    """按备份时间倒序游标分页列出备份记录，支持锚点、时间范围与文件大小过滤。"""
+    qs = BackupRecord.all()
+    if anchor_id is not None:
+        qs = qs.filter(file_anchor_id=anchor_id)
+    if start_time:
+        qs = qs.filter(backup_time__gte=start_time)
+    if end_time:
+        qs = qs.filter(backup_time__lte=end_time)
+    if min_size is not None:
+        qs = qs.filter(source_size__gte=min_size)
+    if max_size is not None:
+        qs = qs.filter(source_size__lte=max_size)
+
+    if cursor:
+        try:
+            key = decode_cursor(cursor)
+            last_time = datetime.fromisoformat(key["time"])
+            last_id = int(key["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
+        qs = qs.filter(Q(backup_time__lt=last_time) | Q(backup_time=last_time, id__lt=last_id))
+
+    records = await qs.prefetch_related("file_anchor").order_by("-backup_time", "-id").limit(limit + 1)
+    has_more = len(records) > limit
+    records = records[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor({"time": records[-1].backup_time.isoformat(), "id": records[-1].id})
+    return BackupRecordPageResponse(
+        items=[BackupRecordResponse.from_model(rec) for rec in records],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/summary", response_model=List[BackupSummaryResponse])
+async def summarize_backups(
+    anchor_id: List[int] | None = Query(default=None, description="仅汇总这些资料锚点，可重复传参"),
+) -> List[BackupSummaryResponse]:
+    """按资料锚点汇总备份数量、最近备份时间与总字节数（一条 GROUP BY 查询）。"""
+    qs = BackupRecord.all()
+    if anchor_id:
+        qs = qs.filter(file_anchor_id__in=anchor_id)
+    rows = (
+        await qs.annotate(backup_count=Count("id"), latest_backup_time=Max("backup_time"), total_bytes=Sum("source_size"))
+        .group_by("file_anchor_id")
+        .order_by("file_anchor_id")
+        .values("file_anchor_id", "backup_count", "latest_backup_time", "total_bytes")
+    )
+    return [
+        BackupSummaryResponse(
+            file_anchor_id=row["file_anchor_id"],
+            backup_count=row["backup_count"],
+            latest_backup_time=row["latest_backup_time"],
+            total_bytes=row["total_bytes"] or 0,
+        )
+        for row in rows
+    ]
 
 
 @router.get("/by-anchor/{anchor_id}", response_model=List[BackupRecordResponse])
@@ -76,8 +164,187 @@ async def list_backups_by_anchor(anchor_id: int) -> List[BackupRecordResponse]:
 
 
 
+class BulkBackupRequest(BaseModel):
+    """请求体：按锚点 ID 列表批量备份。"""
+
+    anchor_ids: List[int] = Field(..., min_length=1)
+    mode: Literal["full", "delta"] = "full"
+    incremental: bool = False
+    verify_hash: bool = False
+
+
+async def _start_backup_job(
+    anchors: list[tuple[int, str]],
+    mode: str,
+    params: dict,
+    missing: list[int] = (),
+    incremental: bool = False,
+    verify_hash: bool = False,
+) -> dict:
+    backup_dir = _load_backup_dir()
+    parallelism, per_device = load_backup_job_options()
+    codec, level = load_compression_options()
+    job = Job(
+        BACKUP_JOB_KIND,
+        total=len(anchors) + len(missing),
+        params={**params, "mode": mode, "incremental": incremental, "verify_hash": verify_hash, "codec": codec},
+    )
+    for anchor_id in missing:
+        job.add_result("failed", anchor_id=anchor_id, path=None, error="资料锚点不存在")
+
+    async def runner(job: Job) -> None:
+        try:
+            await run_backup_job(
+                job,
+                anchors,
+                backup_dir,
+                mode,
+                parallelism,
+                per_device,
+                incremental=incremental,
+                verify_hash=verify_hash,
+                codec=codec,
+                level=level,
+            )
+        finally:
+            await log_operation(
+                "批量备份",
+                f"job_id={job.id};total={job.total};succeeded={job.succeeded};failed={job.failed};skipped={job.skipped}"
+                + (";cancelled" if job.cancel_requested else ""),
+            )
+        if params.get("sweep") and not job.cancel_requested:
+            policy = load_retention_policy()
+            if policy.auto_prune and policy.enabled:
+                _start_prune_job(policy)
+
+    start_job(job, runner)
+    return job.snapshot()
+
+
+def _start_prune_job(policy: RetentionPolicy, dry_run: bool = False) -> Job:
+    job = Job(BACKUP_JOB_KIND, params={"prune": True, "dry_run": dry_run, **asdict(policy)})
+
+    async def runner(job: Job) -> None:
+        await prune_backups(job, policy, dry_run=dry_run)
+        if not dry_run:
+            await log_operation("清理备份", f"job_id={job.id};deleted={job.succeeded}")
+
+    return start_job(job, runner)
+
+
+@router.post("/folder/{folder_id}", status_code=status.HTTP_202_ACCEPTED)
+async def backup_folder(
+    folder_id: int,
+    mode: Literal["full", "delta"] = Query("full", description="full 整文件备份；delta 块级增量备份"),
+    incremental: bool = Query(False, description="只备份自上次备份以来发生变化的文件"),
+    verify_hash: bool = Query(False, description="增量模式下，大小相同但修改时间变化的文件再比较内容哈希"),
+):
+    """
+    备份虚拟文件夹下的全部资料锚点（后台任务），返回任务状态，通过 GET /backups/jobs/{job_id} 查询进度。
+    """
+    folder = await VirtualFolder.filter(id=folder_id).first()
+    if not folder:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="虚拟文件夹不存在")
+    anchors = await (
+        FileAnchor.filter(virtual_folders__id=folder_id).distinct().order_by("id").values_list("id", "path")
+    )
+    return await _start_backup_job(
+        anchors, mode, {"folder_id": folder_id}, incremental=incremental, verify_hash=verify_hash
+    )
+
+
+@router.post("/sweep", status_code=status.HTTP_202_ACCEPTED)
+async def backup_sweep(
+    mode: Literal["full", "delta"] = Query("full", description="full 整文件备份；delta 块级增量备份"),
+    incremental: bool = Query(True, description="只备份自上次备份以来发生变化的文件"),
+    verify_hash: bool = Query(False, description="增量模式下，大小相同但修改时间变化的文件再比较内容哈希"),
+):
+    """
+    定期备份：对回收站以外的全部资料锚点执行（默认增量）备份，未变化的文件只需一次 stat。
+    """
+    recycle_folder = await VirtualFolder.filter(name=RECYCLE_FOLDER_NAME).first()
+    recycled = set()
+    if recycle_folder:
+        recycled = set(await FileAnchor.filter(virtual_folders__id=recycle_folder.id).values_list("id", flat=True))
+    anchors = [
+        (aid, path)
+        for aid, path in await FileAnchor.all().order_by("id").values_list("id", "path")
+        if aid not in recycled
+    ]
+    return await _start_backup_job(anchors, mode, {"sweep": True}, incremental=incremental, verify_hash=verify_hash)
+
+
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def backup_anchors_bulk(payload: BulkBackupRequest):
+    """按锚点 ID 列表批量备份（后台任务）；不存在的 ID 记为失败项。"""
+    anchor_ids = list(dict.fromkeys(payload.anchor_ids))
+    found: dict[int, str] = {}
+    for start in range(0, len(anchor_ids), 900):
+        found.update(await FileAnchor.filter(id__in=anchor_ids[start:start + 900]).values_list("id", "path"))
+    anchors = [(aid, found[aid]) for aid in anchor_ids if aid in found]
+    missing = [aid for aid in anchor_ids if aid not in found]
+    return await _start_backup_job(
+        anchors,
+        payload.mode,
+        {"anchor_count": len(anchor_ids)},
+        missing,
+        incremental=payload.incremental,
+        verify_hash=payload.verify_hash,
+    )
+
+
+@router.get("/retention")
+async def get_retention_policy():
+    """查询 settings.toml 中配置的备份保留策略。"""
+    policy = load_retention_policy()
+    return {"enabled": policy.enabled, **asdict(policy)}
+
+
+@router.post("/prune", status_code=status.HTTP_202_ACCEPTED)
+async def prune_expired_backups(dry_run: bool = Query(False, description="只列出将被清理的备份，不实际删除")):
+    """
+    按保留策略清理全部资料锚点的旧备份（后台任务），逐项结果为被清理的备份记录。
+    """
+    policy = load_retention_policy()
+    if not policy.enabled:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="未配置备份保留策略")
+    return _start_prune_job(policy, dry_run=dry_run).snapshot()
+
+
+@router.get("/jobs")
+async def list_backup_jobs():
+    """列出最近的批量备份与清理任务（不含逐项结果）。"""
+    return [job.snapshot() for job in list_jobs(BACKUP_JOB_KIND)]
+
+
+@router.get("/jobs/{job_id}")
+async def get_backup_job(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="逐项结果起始位置"),
+    limit: int = Query(200, ge=0, le=5000, description="逐项结果条数"),
+):
+    """查询批量备份任务的进度与逐项结果。"""
+    job = get_job(job_id, BACKUP_JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="备份任务不存在")
+    return job.snapshot(offset=offset, limit=limit)
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_backup_job(job_id: str):
+    """取消批量备份任务：正在复制的文件完成后停止，已完成的备份保留。"""
+    job = get_job(job_id, BACKUP_JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="备份任务不存在")
+    cancel_job(job)
+    return job.snapshot()
+
+
 @router.post("/{anchor_id}", response_model=BackupRecordResponse, status_code=status.HTTP_201_CREATED)
-async def backup_anchor(anchor_id: int) -> BackupRecordResponse:
+async def backup_anchor(
+    anchor_id: int,
+    mode: Literal["full", "delta"] = Query("full", description="full 整文件备份；delta 块级增量备份，适合频繁小改动的大文件"),
+) -> BackupRecordResponse:
     anchor = await FileAnchor.filter(id=anchor_id).first()
     if not anchor:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="资料锚点不存在")
@@ -87,21 +354,14 @@ async def backup_anchor(anchor_id: int) -> BackupRecordResponse:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="资料文件不存在")
 
     backup_dir = _load_backup_dir()
-    backup_dir.mkdir(parents=True, exist_ok=True)
-
-    dest_dir = backup_dir / str(anchor.id)
-    dest_dir.mkdir(parents=True, exist_ok=True)
-
-    ts = int(time.time())
-    dest_path = dest_dir / f"{source.stem}-{ts}{source.suffix}"
 
+    # 内容按哈希去重存放：未变化的文件、指向同一文件的多个锚点只保存一份
     try:
-        shutil.copy2(source, dest_path)
+        codec, level = load_compression_options()
+        rec = await create_backup(anchor, source, backup_dir, mode=mode, codec=codec, level=level)
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"备份失败: {exc}")
 
-    rec = await BackupRecord.create(file_anchor=anchor, backup_path=str(dest_path))
-
     await log_operation("创建备份", f"anchor_id={anchor.id};backup_id={rec.id}")
     return BackupRecordResponse.from_model(rec)
 
@@ -124,9 +384,12 @@ async def restore_backup(backup_id: int) -> BackupRecordResponse:
     target.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        shutil.copy2(backup_path, target)
+        # 整文件备份直接复制，增量备份按块清单流式重建；均校验已记录的哈希，不一致则不写入目标文件
+        await restore_backup_content(rec, target)
         anchor.is_valid = True
         await anchor.save()
+    except BackupIntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="备份文件校验失败，可能已损坏")
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"恢复失败: {exc}")
 
@@ -143,14 +406,7 @@ async def delete_backup(backup_id: int) -> None:
     if not rec:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="备份记录不存在")
 
-    backup_path = Path(rec.backup_path).expanduser()
-    try:
-        if backup_path.exists():
-            backup_path.unlink()
-    except Exception:
-        # 如果文件删除失败，不影响记录删除，避免阻塞
-        pass
-
-    await rec.delete()
+    # 仅当没有其他备份记录引用同一内容时才删除文件
+    await release_backups([rec])
 
     await log_operation("删除备份", f"backup_id={backup_id}")
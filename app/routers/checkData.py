@@ -1,29 +1,77 @@
-from pathlib import Path
-
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 
 from models import FileAnchor, VirtualFolder
+from utils.path_check import apply_validity, check_paths, load_check_options
+from utils.path_scan import get_scan_progress, start_validity_scan
+from utils.path_watch import get_watcher
 
 
 router = APIRouter(prefix="/check", tags=["check"])
 
 
 @router.post("/{folder_id}/anchors")
-async def check_folder_anchors(folder_id: int):
+async def check_folder_anchors(
+    folder_id: int,
+    parallelism: int | None = Query(default=None, ge=1, le=64, description="并发检测线程数，默认读取设置"),
+    timeout: float | None = Query(default=None, gt=0, le=60, description="单个路径检测超时（秒），默认读取设置"),
+):
     """
     检查指定虚拟文件夹下的资料锚点路径是否存在，更新 is_valid 状态并返回结果列表。
+    - 路径检测在线程池中进行，不阻塞事件循环；超时未响应的路径（如网络盘不可达）状态为 unknown，is_valid 保持不变。
+    - 状态变化分别以一条批量 UPDATE 写回。
     """
     folder = await VirtualFolder.filter(id=folder_id).first()
     if not folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="虚拟文件夹不存在")
 
-    anchors = await FileAnchor.filter(virtual_folders__id=folder_id).all()
+    default_parallelism, default_timeout = load_check_options()
+    rows = await FileAnchor.filter(virtual_folders__id=folder_id).values_list("id", "path", "is_valid")
+    checked = await check_paths(
+        [path for _, path, _ in rows],
+        parallelism=parallelism or default_parallelism,
+        timeout=timeout or default_timeout,
+    )
+
+    current = {anchor_id: bool(valid) for anchor_id, _, valid in rows}
+    by_id = {anchor_id: checked.get(path) for anchor_id, path, _ in rows}
+    await apply_validity(current, by_id)
+
     results = []
-    for anchor in anchors:
-        exists = Path(anchor.path).expanduser().exists()
-        if anchor.is_valid != exists:
-            anchor.is_valid = exists
-            await anchor.save()
-        results.append({"id": anchor.id, "path": anchor.path, "is_valid": anchor.is_valid})
+    for anchor_id, path, valid in rows:
+        exists = by_id[anchor_id]
+        results.append({
+            "id": anchor_id,
+            "path": path,
+            "is_valid": bool(valid) if exists is None else exists,
+            "status": "unknown" if exists is None else ("valid" if exists else "invalid"),
+        })
 
     return {"folder_id": folder_id, "anchors": results}
+
+
+@router.get("/scan")
+async def get_validity_scan_progress():
+    """
+    查询后台全量路径有效性扫描的进度（启动时自动运行一次）。
+    """
+    return get_scan_progress()
+
+
+@router.post("/scan", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_validity_scan():
+    """
+    手动触发一次后台全量扫描；已有扫描进行中时直接返回当前进度。
+    """
+    started = start_validity_scan()
+    return {"started": started, **get_scan_progress()}
+
+
+@router.get("/watch")
+async def get_path_watch_status():
+    """
+    查询文件系统监听状态（需在设置中开启 [path_watch] enabled = true）。
+    """
+    watcher = get_watcher()
+    if watcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **watcher.stats()}
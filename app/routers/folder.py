@@ -4,13 +4,17 @@ from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict, Field
 from tortoise.exceptions import IntegrityError
 
-from models import FileAnchor, Tag, VirtualFolder
+from models import FileAnchor, VirtualFolder
+from utils.jobs import Job, cancel_job, get_job, list_jobs, start_job
 from utils.operation_log import log_operation
-from routers.anchor import AnchorResponse
+from utils.pagination import decode_cursor, encode_cursor
+from utils.recycle_purge import purge_recycle_bin
+from routers.anchor import AnchorPageResponse, AnchorResponse, build_anchor_responses
 
 
 router = APIRouter(prefix="/folders", tags=["virtual-folders"])
 RECYCLE_FOLDER_NAME = "回收站"
+PURGE_JOB_KIND = "recycle_purge"
 
 
 class VirtualFolderCreate(BaseModel):
@@ -127,43 +131,84 @@ async def list_folder_anchors(folder_id: int) -> list[AnchorResponse]:
 
     anchors = await FileAnchor.filter(virtual_folders__id=folder_id).distinct()
 
-    results: list[AnchorResponse] = []
-    for anchor in anchors:
-        folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
-        tag_ids = await anchor.tags.all().values_list("id", flat=True)
-        results.append(
-            AnchorResponse(
-                id=anchor.id,
-                name=anchor.name,
-                path=anchor.path,
-                description=anchor.description,
-                is_valid=anchor.is_valid,
-                create_time=anchor.create_time,
-                update_time=anchor.update_time,
-                virtual_folder_ids=list(folder_ids),
-                tag_ids=list(tag_ids),
-            )
-        )
+    return await build_anchor_responses(anchors)
+
+
+@router.get("/{folder_id}/anchors/page", response_model=AnchorPageResponse)
+async def list_folder_anchors_page(
+    folder_id: int,
+    limit: int = Query(default=200, ge=1, le=1000, description="每页数量"),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor，为空则从第一页开始"),
+) -> AnchorPageResponse:
+    """
+    按 id 升序游标分页列出虚拟文件夹下的资料锚点。
+    - 使用 id > 上一页最后一条的 keyset 条件，翻页开销与页码无关（不使用 OFFSET）。
+    """
+    folder = await VirtualFolder.filter(id=folder_id).first()
+    if not folder:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="虚拟文件夹不存在")
+
+    qs = FileAnchor.filter(virtual_folders__id=folder_id)
+    if cursor:
+        try:
+            last_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
+        qs = qs.filter(id__gt=last_id)
 
-    return results
+    # 多取一条用于判断是否还有下一页
+    anchors = await qs.order_by("id").limit(limit + 1)
+    has_more = len(anchors) > limit
+    anchors = anchors[:limit]
 
+    next_cursor = encode_cursor({"id": anchors[-1].id}) if has_more else None
+    return AnchorPageResponse(items=await build_anchor_responses(anchors), next_cursor=next_cursor)
 
-@router.delete("/recycle/empty", status_code=status.HTTP_204_NO_CONTENT)
-async def empty_recycle_bin() -> None:
+
+@router.delete("/recycle/empty", status_code=status.HTTP_202_ACCEPTED)
+async def empty_recycle_bin():
     """
-    清空回收站：永久删除回收站中的所有资料锚点。
+    清空回收站：永久删除回收站中的所有资料锚点（后台任务），返回任务状态，
+    通过 GET /folders/recycle/jobs/{job_id} 查询进度。
+    - 已有清空任务在进行时直接返回该任务。
     """
     recycle_folder = await VirtualFolder.filter(name=RECYCLE_FOLDER_NAME).first()
     if not recycle_folder:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="回收站不存在")
 
-    anchors = await FileAnchor.filter(virtual_folders__id=recycle_folder.id).distinct()
-    for anchor in anchors:
-        tags = await anchor.tags.all()
-        for tag in tags:
-            if tag.use_count > 0:
-                tag.use_count -= 1
-                await tag.save()
-        await anchor.delete()
+    running = [job for job in list_jobs(PURGE_JOB_KIND) if not job.finished]
+    if running:
+        return running[0].snapshot()
+
+    job = Job(PURGE_JOB_KIND, params={"recycle_folder_id": recycle_folder.id})
+
+    async def runner(job: Job) -> None:
+        try:
+            await purge_recycle_bin(job, recycle_folder.id)
+        finally:
+            await log_operation(
+                "清空回收站",
+                f"recycle_folder_id={recycle_folder.id};job_id={job.id};deleted={job.succeeded}"
+                + (";cancelled" if job.cancel_requested else ""),
+            )
+
+    return start_job(job, runner).snapshot()
+
+
+@router.get("/recycle/jobs/{job_id}")
+async def get_recycle_purge_job(job_id: str):
+    """查询清空回收站任务的进度。"""
+    job = get_job(job_id, PURGE_JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="清空任务不存在")
+    return job.snapshot()
+
 
-    await log_operation("清空回收站", f"recycle_folder_id={recycle_folder.id}")
+@router.post("/recycle/jobs/{job_id}/cancel")
+async def cancel_recycle_purge_job(job_id: str):
+    """取消清空回收站任务：当前块删除后停止，未删除的锚点仍留在回收站。"""
+    job = get_job(job_id, PURGE_JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="清空任务不存在")
+    cancel_job(job)
+    return job.snapshot()
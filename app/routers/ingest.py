@@ -0,0 +1,80 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel, Field
+
+from routers.anchor import get_target_folders
+from utils.anchor_ingest import run_ingest_job
+from utils.jobs import Job, cancel_job, get_job, list_jobs, start_job
+from utils.operation_log import log_operation
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+INGEST_JOB_KIND = "ingest"
+
+
+class IngestRequest(BaseModel):
+    """请求体：把一个目录树导入为资料锚点。"""
+
+    root: str = Field(..., min_length=1, max_length=1024, description="要导入的根目录")
+    folder_id: int = Field(..., description="导入到的实际虚拟文件夹（不可为“全部资料”）")
+    include: list[str] = Field(default_factory=list, description="只导入匹配的文件，如 *.pdf；为空表示全部")
+    exclude: list[str] = Field(default_factory=list, description="跳过匹配的文件与目录，如 .git、*.tmp")
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_directory(payload: IngestRequest):
+    """
+    递归导入目录（后台任务），返回任务状态，通过 GET /ingest/jobs/{job_id} 查询进度与吞吐。
+    - 已是资料锚点的路径跳过；新锚点同时绑定“全部资料”与目标文件夹。
+    - 逐项结果只记录失败项（无法读取的目录等）。
+    """
+    target_folder, all_folder = await get_target_folders(payload.folder_id)
+    root = os.path.abspath(os.path.expanduser(payload.root))
+    if not os.path.isdir(root):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="目录不存在")
+
+    job = Job(
+        INGEST_JOB_KIND,
+        params={"root": root, "folder_id": target_folder.id, "include": payload.include, "exclude": payload.exclude},
+    )
+
+    async def runner(job: Job) -> None:
+        try:
+            await run_ingest_job(job, root, [all_folder.id, target_folder.id], payload.include, payload.exclude)
+        finally:
+            await log_operation(
+                "导入目录",
+                f"job_id={job.id};folder_id={target_folder.id};added={job.succeeded};skipped={job.skipped};failed={job.failed}"
+                + (";cancelled" if job.cancel_requested else ""),
+            )
+
+    return start_job(job, runner).snapshot()
+
+
+@router.get("/jobs")
+async def list_ingest_jobs():
+    """列出最近的目录导入任务（不含逐项结果）。"""
+    return [job.snapshot() for job in list_jobs(INGEST_JOB_KIND)]
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="逐项结果起始位置"),
+    limit: int = Query(200, ge=0, le=5000, description="逐项结果条数"),
+):
+    """查询目录导入任务的进度（已处理数、吞吐、已遍历目录数等）与失败项。"""
+    job = get_job(job_id, INGEST_JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="导入任务不存在")
+    return job.snapshot(offset=offset, limit=limit)
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_ingest_job(job_id: str):
+    """取消目录导入任务：当前批次写入后停止，已导入的锚点保留。"""
+    job = get_job(job_id, INGEST_JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="导入任务不存在")
+    cancel_job(job)
+    return job.snapshot()
@@ -1,13 +1,19 @@
 from datetime import datetime
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict
+from tortoise import connections
+from tortoise.expressions import Q
 
 from models import OperatorLog
+from utils.pagination import decode_cursor, encode_cursor
 
 
 router = APIRouter(prefix="/logs", tags=["operator-logs"])
 
+# 带类型过滤时精确计数的上限，超过后按上限返回估计值，保证计数开销有界
+COUNT_ESTIMATE_CAP = 10000
+
 
 class OperatorLogResponse(BaseModel):
     id: int
@@ -20,10 +26,108 @@ class OperatorLogResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-@router.get("/", response_model=list[OperatorLogResponse])
-async def list_operator_logs() -> list[OperatorLogResponse]:
-    """列出全部操作日志，按时间倒序。"""
-    logs = await OperatorLog.all().prefetch_related("operator_type").order_by("-time")
+class OperatorLogPageResponse(BaseModel):
+    """响应体：游标分页的操作日志。total_estimate 为总条数估计值，仅用于展示页数。"""
+
+    items: list[OperatorLogResponse]
+    next_cursor: str | None = None
+    total_estimate: int
+
+
+def _id_span_queries(start_time: datetime | None, end_time: datetime | None) -> list[tuple[str, list]]:
+    """
+    生成无类型过滤时求 id 跨度的两条查询（首条、末条），每条都只读取一行：
+    - 无时间范围：分别取 MIN(id) / MAX(id)，各自是一次主键查找（两者合写会退化为全表扫描）；
+    - 有时间范围：沿 time 索引（隐含 id）正序取第一条、倒序取最后一条，找到即停。
+    """
+    if start_time is None and end_time is None:
+        return [
+            ('SELECT MIN("id") AS "id" FROM "operatorlog"', []),
+            ('SELECT MAX("id") AS "id" FROM "operatorlog"', []),
+        ]
+
+    time_field = OperatorLog._meta.fields_map["time"]
+    clauses: list[str] = []
+    params: list = []
+    if start_time:
+        clauses.append('"time" >= ?')
+        params.append(time_field.to_db_value(start_time, OperatorLog))
+    if end_time:
+        clauses.append('"time" <= ?')
+        params.append(time_field.to_db_value(end_time, OperatorLog))
+    where = " AND ".join(clauses)
+    return [
+        (f'SELECT "id" FROM "operatorlog" WHERE {where} ORDER BY "time", "id" LIMIT 1', params),
+        (f'SELECT "id" FROM "operatorlog" WHERE {where} ORDER BY "time" DESC, "id" DESC LIMIT 1', params),
+    ]
+
+
+async def _estimate_total(
+    operator_type_id: int | None,
+    start_time: datetime | None,
+    end_time: datetime | None,
+) -> int:
+    """
+    估计满足条件的日志条数：
+    - 无类型过滤：日志只追加，用范围内首条与末条的 id 之差估计，两次查询各只读一行；
+    - 有类型过滤：走 (operator_type_id, time) 索引在 SQL 中计数，至多 COUNT_ESTIMATE_CAP 条即停止。
+    """
+    conn = connections.get("default")
+    if operator_type_id is None:
+        ids: list[int] = []
+        for sql, args in _id_span_queries(start_time, end_time):
+            rows = await conn.execute_query_dict(sql, args)
+            if not rows or rows[0]["id"] is None:
+                return 0
+            ids.append(rows[0]["id"])
+        first_id, last_id = ids
+        return max(last_id - first_id + 1, 0)
+
+    time_field = OperatorLog._meta.fields_map["time"]
+    clauses = ['"operator_type_id" = ?']
+    params: list = [operator_type_id]
+    if start_time:
+        clauses.append('"time" >= ?')
+        params.append(time_field.to_db_value(start_time, OperatorLog))
+    if end_time:
+        clauses.append('"time" <= ?')
+        params.append(time_field.to_db_value(end_time, OperatorLog))
+    rows = await conn.execute_query_dict(
+        f'SELECT COUNT(*) AS "n" FROM (SELECT 1 FROM "operatorlog" WHERE {" AND ".join(clauses)} LIMIT ?)',
+        params + [COUNT_ESTIMATE_CAP],
+    )
+    return rows[0]["n"]
+
+
+@router.get("/", response_model=OperatorLogPageResponse)
+async def list_operator_logs(
+    limit: int = Query(default=50, ge=1, le=500, description="每页数量"),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor"),
+    operator_type_id: int | None = Query(default=None, description="按操作类型过滤"),
+    start_time: datetime | None = Query(default=None, description="起始时间（含）"),
+    end_time: datetime | None = Query(default=None, description="结束时间（含）"),
+) -> OperatorLogPageResponse:
+    """按时间倒序游标分页列出操作日志，支持操作类型与时间范围过滤。"""
+    qs = OperatorLog.all()
+    if operator_type_id is not None:
+        qs = qs.filter(operator_type_id=operator_type_id)
+    if start_time:
+        qs = qs.filter(time__gte=start_time)
+    if end_time:
+        qs = qs.filter(time__lte=end_time)
+
+    if cursor:
+        try:
+            key = decode_cursor(cursor)
+            last_time = datetime.fromisoformat(key["time"])
+            last_id = int(key["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
+        qs = qs.filter(Q(time__lt=last_time) | Q(time=last_time, id__lt=last_id))
+
+    logs = await qs.prefetch_related("operator_type").order_by("-time", "-id").limit(limit + 1)
+    has_more = len(logs) > limit
+    logs = logs[:limit]
 
     results: list[OperatorLogResponse] = []
     for log in logs:
@@ -38,4 +142,13 @@ async def list_operator_logs() -> list[OperatorLogResponse]:
                 time=log.time,
             )
         )
-    return results
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor({"time": logs[-1].time.isoformat(), "id": logs[-1].id})
+
+    return OperatorLogPageResponse(
+        items=results,
+        next_cursor=next_cursor,
+        total_estimate=await _estimate_total(operator_type_id, start_time, end_time),
+    )
@@ -5,7 +5,10 @@ from pydantic import BaseModel, ConfigDict
 
 from models import FileAnchor, Tag, VirtualFolder
 from utils.operation_log import log_operation
-from routers.anchor import AnchorResponse
+from utils.pagination import decode_cursor, encode_cursor
+from utils.tag_counts import reconcile_tag_counts
+from utils.tag_filter import filter_anchor_ids_by_tags
+from routers.anchor import AnchorPageResponse, AnchorResponse, build_anchor_responses
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
@@ -33,6 +36,14 @@ async def list_tags_by_usage() -> list[TagResponse]:
     return [TagResponse.model_validate(t) for t in tags]
 
 
+@router.post("/reconcile")
+async def reconcile_tag_usage():
+    """
+    立即按实际绑定数校准全部标签的 use_count（平时由触发器实时维护，后台也会定期校准）。
+    """
+    return {"corrected": await reconcile_tag_counts()}
+
+
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_tag(tag_id: int) -> None:
     """
@@ -48,48 +59,103 @@ async def delete_tag(tag_id: int) -> None:
     await log_operation("删除标签", f"tag_id={tag_id}")
 
 
+def _clean_names(names: list[str] | None) -> list[str]:
+    return list(dict.fromkeys(n.strip() for n in names or [] if n.strip()))
+
+
+async def _resolve_tag_filters(
+    tag_names: list[str] | None,
+    any_tag_names: list[str] | None,
+    exclude_tag_names: list[str] | None,
+) -> tuple[list[int], list[int], list[int]] | None:
+    """
+    一次查询把三组标签名称解析为 ID。
+    AND 中有不存在的标签、或 OR 中的标签全部不存在时结果必为空，返回 None；NOT 中不存在的标签直接忽略。
+    """
+    all_names = _clean_names(tag_names)
+    any_names = _clean_names(any_tag_names)
+    none_names = _clean_names(exclude_tag_names)
+    if not (all_names or any_names or none_names):
+        raise HTTPException(status_code=400, detail="标签名称不能为空")
+
+    id_by_name = {
+        t["name"]: t["id"] for t in await Tag.filter(name__in=all_names + any_names + none_names).values("id", "name")
+    }
+    if any(name not in id_by_name for name in all_names):
+        return None
+    any_ids = [id_by_name[n] for n in any_names if n in id_by_name]
+    if any_names and not any_ids:
+        return None
+    return [id_by_name[n] for n in all_names], any_ids, [id_by_name[n] for n in none_names if n in id_by_name]
+
+
+async def _load_anchors(ids: list[int]) -> list[FileAnchor]:
+    """按升序 ID 加载锚点；分批查询，避免超出 SQLite 单条语句的参数上限（旧版本为 999）。"""
+    anchors: list[FileAnchor] = []
+    for start in range(0, len(ids), 900):
+        anchors.extend(await FileAnchor.filter(id__in=ids[start:start + 900]).order_by("id"))
+    return anchors
+
+
 @router.get("/anchors", response_model=list[AnchorResponse])
 async def list_anchors_by_tags(
-    tag_names: list[str] = Query(..., description="标签名称列表，多个标签间为 AND 关系"),
     folder_id: int = Query(..., description="当前所在虚拟文件夹 ID"),
+    tag_names: list[str] | None = Query(default=None, description="必须同时包含的标签（AND）"),
+    any_tag_names: list[str] | None = Query(default=None, description="至少包含其一的标签（OR）"),
+    exclude_tag_names: list[str] | None = Query(default=None, description="不能包含的标签（NOT）"),
 ) -> list[AnchorResponse]:
     """
-    按多标签 + 文件夹过滤资料锚点（AND 关系：必须同时包含所有指定标签）。
-    标签不存在则返回空列表。
+    按多标签 + 文件夹过滤资料锚点，三组条件同时生效：
+    - tag_names：必须同时包含所有指定标签，有标签不存在则返回空列表；
+    - any_tag_names：至少包含其中一个标签；
+    - exclude_tag_names：不包含任何指定标签。
+    标签交集在一条 GROUP BY / HAVING 查询中完成，与标签数量无关。
     """
     folder = await VirtualFolder.filter(id=folder_id).first()
     if not folder:
         raise HTTPException(status_code=404, detail="虚拟文件夹不存在")
 
-    names = [n.strip() for n in tag_names if n.strip()]
-    if not names:
-        raise HTTPException(status_code=400, detail="标签名称不能为空")
-
-    tags = await Tag.filter(name__in=names)
-    if len(tags) != len(names):
+    filters = await _resolve_tag_filters(tag_names, any_tag_names, exclude_tag_names)
+    if filters is None:
         return []
 
-    anchors = await FileAnchor.filter(virtual_folders__id=folder_id)
-    for tag in tags:
-        anchors = anchors.filter(tags__id=tag.id)
-    anchors = await anchors.distinct()
-
-    results: list[AnchorResponse] = []
-    for anchor in anchors:
-        folder_ids = await anchor.virtual_folders.all().values_list("id", flat=True)
-        tag_ids = await anchor.tags.all().values_list("id", flat=True)
-        results.append(
-            AnchorResponse(
-                id=anchor.id,
-                name=anchor.name,
-                path=anchor.path,
-                description=anchor.description,
-                is_valid=anchor.is_valid,
-                create_time=anchor.create_time,
-                update_time=anchor.update_time,
-                virtual_folder_ids=list(folder_ids),
-                tag_ids=list(tag_ids),
-            )
-        )
-
-    return results
+    ids = await filter_anchor_ids_by_tags(folder_id, *filters)
+    anchors = await _load_anchors(ids)
+    return await build_anchor_responses(anchors)
+
+
+@router.get("/anchors/page", response_model=AnchorPageResponse)
+async def list_anchors_by_tags_page(
+    folder_id: int = Query(..., description="当前所在虚拟文件夹 ID"),
+    tag_names: list[str] | None = Query(default=None, description="必须同时包含的标签（AND）"),
+    any_tag_names: list[str] | None = Query(default=None, description="至少包含其一的标签（OR）"),
+    exclude_tag_names: list[str] | None = Query(default=None, description="不能包含的标签（NOT）"),
+    limit: int = Query(default=200, ge=1, le=1000, description="每页数量"),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor，为空则从第一页开始"),
+) -> AnchorPageResponse:
+    """
+    与 GET /tags/anchors 条件相同，按 id 升序游标分页返回。
+    """
+    folder = await VirtualFolder.filter(id=folder_id).first()
+    if not folder:
+        raise HTTPException(status_code=404, detail="虚拟文件夹不存在")
+
+    last_id = None
+    if cursor:
+        try:
+            last_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
+
+    filters = await _resolve_tag_filters(tag_names, any_tag_names, exclude_tag_names)
+    if filters is None:
+        return AnchorPageResponse(items=[])
+
+    # 多取一条用于判断是否还有下一页
+    ids = await filter_anchor_ids_by_tags(folder_id, *filters, after_id=last_id, limit=limit + 1)
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+    anchors = await _load_anchors(ids)
+
+    next_cursor = encode_cursor({"id": ids[-1]}) if has_more else None
+    return AnchorPageResponse(items=await build_anchor_responses(anchors), next_cursor=next_cursor)
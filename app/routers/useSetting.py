@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import os
-import tomllib  # 只能用于读取toml文件
 import tomli_w  # 可以写toml文件
 from pathlib import Path
 
@@ -9,27 +7,13 @@ from fastapi import APIRouter, HTTPException, status
 import webview
 from pydantic import BaseModel, Field
 
-router = APIRouter(prefix="/settings", tags=["settings"])
-
-
-def _settings_file() -> Path:
-    root = Path(os.getenv("LOCALAPPDATA", Path.home())) / "FAIO_Data"
-    root.mkdir(parents=True, exist_ok=True)
-    return root / "settings.toml"
+from utils.settings import load_settings, settings_file
 
-
-def _load_settings() -> dict:
-    path = _settings_file()
-    if not path.exists():
-        return {}
-    try:
-        return tomllib.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+router = APIRouter(prefix="/settings", tags=["settings"])
 
 
 def _save_settings(data: dict) -> None:
-    path = _settings_file()
+    path = settings_file()
     path.write_text(tomli_w.dumps(data), encoding="utf-8")
 
 
@@ -43,7 +27,7 @@ class BackupPathUpdate(BaseModel):
 
 @router.get("/backup/path", response_model=BackupPathResponse)
 def get_backup_path() -> BackupPathResponse:
-    data = _load_settings()
+    data = load_settings()
     return BackupPathResponse(backup_path=data.get("backup_path", ""))
 
 
@@ -68,7 +52,7 @@ def select_backup_path() -> BackupPathResponse:
     if not Path(chosen).is_dir():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请选择文件夹路径")
 
-    data = _load_settings()
+    data = load_settings()
     data["backup_path"] = chosen
     _save_settings(data)
     return BackupPathResponse(backup_path=chosen)
@@ -0,0 +1,78 @@
+"""
+资料锚点的集合式批量操作：移入回收站、恢复、绑定文件夹与标签。
+
+均需在事务中调用（传入 in_transaction 返回的连接），对中间表整批 DELETE / INSERT，
+语句数量与锚点数、标签数无关（仅按 SQL 参数上限分批）；标签 use_count 由中间表触发器同步，见 utils.tag_counts。
+"""
+from collections.abc import Iterable
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+SQL_CHUNK_SIZE = 900
+FOLDER_THROUGH_TABLE = "fileanchor_virtualfolder"
+TAG_THROUGH_TABLE = "fileanchor_tag"
+
+
+def _chunks(ids: list[int], size: int = SQL_CHUNK_SIZE) -> Iterable[list[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _placeholders(values: list) -> str:
+    return ",".join("?" for _ in values)
+
+
+async def anchors_in_folder(conn: BaseDBAsyncClient, anchor_ids: list[int], folder_id: int) -> set[int]:
+    """返回 anchor_ids 中绑定了指定虚拟文件夹的锚点。"""
+    found: set[int] = set()
+    for chunk in _chunks(anchor_ids):
+        rows = await conn.execute_query_dict(
+            f'SELECT "fileanchor_id" FROM "{FOLDER_THROUGH_TABLE}" '
+            f'WHERE "virtualfolder_id" = ? AND "fileanchor_id" IN ({_placeholders(chunk)})',
+            [folder_id, *chunk],
+        )
+        found.update(row["fileanchor_id"] for row in rows)
+    return found
+
+
+async def release_anchor_tags(conn: BaseDBAsyncClient, anchor_ids: list[int]) -> None:
+    """解除锚点的全部标签：整批删除标签关联。"""
+    for chunk in _chunks(anchor_ids):
+        await conn.execute_query(
+            f'DELETE FROM "{TAG_THROUGH_TABLE}" WHERE "fileanchor_id" IN ({_placeholders(chunk)})', chunk
+        )
+
+
+async def replace_anchor_folders(conn: BaseDBAsyncClient, anchor_ids: list[int], folder_ids: list[int]) -> None:
+    """把锚点的文件夹绑定整体替换为 folder_ids。"""
+    for chunk in _chunks(anchor_ids):
+        await conn.execute_query(
+            f'DELETE FROM "{FOLDER_THROUGH_TABLE}" WHERE "fileanchor_id" IN ({_placeholders(chunk)})', chunk
+        )
+    await add_anchor_folders(conn, anchor_ids, folder_ids)
+
+
+async def add_anchor_folders(conn: BaseDBAsyncClient, anchor_ids: list[int], folder_ids: list[int]) -> None:
+    """为锚点追加文件夹绑定，已存在的绑定忽略（依赖中间表的唯一索引）。"""
+    if not anchor_ids or not folder_ids:
+        return
+    await conn.execute_many(
+        f'INSERT OR IGNORE INTO "{FOLDER_THROUGH_TABLE}" ("fileanchor_id", "virtualfolder_id") VALUES (?, ?)',
+        [[anchor_id, folder_id] for anchor_id in anchor_ids for folder_id in folder_ids],
+    )
+
+
+async def add_anchor_tags(conn: BaseDBAsyncClient, anchor_ids: list[int], tag_ids: list[int]) -> None:
+    """为锚点追加标签绑定，已存在的绑定忽略（被忽略的行不触发 use_count 加 1）。"""
+    if not anchor_ids or not tag_ids:
+        return
+    await conn.execute_many(
+        f'INSERT OR IGNORE INTO "{TAG_THROUGH_TABLE}" ("fileanchor_id", "tag_id") VALUES (?, ?)',
+        [[anchor_id, tag_id] for anchor_id in anchor_ids for tag_id in tag_ids],
+    )
+
+
+async def recycle_anchors(conn: BaseDBAsyncClient, anchor_ids: list[int], recycle_folder_id: int) -> None:
+    """移入回收站：解除全部标签，文件夹绑定只保留回收站。"""
+    await release_anchor_tags(conn, anchor_ids)
+    await replace_anchor_folders(conn, anchor_ids, [recycle_folder_id])
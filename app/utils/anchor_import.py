@@ -0,0 +1,41 @@
+"""
+资料锚点批量写入：在调用方的事务内 bulk_create 锚点，再用 executemany 一次写入文件夹中间表关联，
+避免逐条 create + M2M add + refresh 的往返。
+"""
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+ANCHOR_BATCH_SIZE = 500
+FOLDER_THROUGH_TABLE = "fileanchor_virtualfolder"
+
+
+async def insert_anchors(conn: BaseDBAsyncClient, anchors: list, folder_ids: list[int]) -> list[int]:
+    """
+    批量插入锚点并绑定到指定虚拟文件夹，必须在事务中调用（in_transaction 返回的连接）。
+    插入后按顺序回填各锚点对象的 id。
+
+    :param anchors: 尚未保存的 FileAnchor 对象
+    :param folder_ids: 每个锚点都要绑定的虚拟文件夹 ID
+    :return: 新锚点 ID，顺序与 anchors 一致
+    """
+    from models import FileAnchor  # 延迟导入，避免循环引用
+
+    if not anchors:
+        return []
+
+    # SQLite 的 bulk_create 不回填主键；事务内只有本连接在写，新行的 id 即为插入前最大 id 之后的连续区间
+    rows = await conn.execute_query_dict('SELECT COALESCE(MAX("id"), 0) AS "max_id" FROM "fileanchor"')
+    max_id = rows[0]["max_id"]
+    await FileAnchor.bulk_create(anchors, batch_size=ANCHOR_BATCH_SIZE, using_db=conn)
+    rows = await conn.execute_query_dict('SELECT "id" FROM "fileanchor" WHERE "id" > ? ORDER BY "id"', [max_id])
+    ids = [row["id"] for row in rows]
+    if len(ids) != len(anchors):
+        raise RuntimeError("批量插入锚点后回读的 ID 数量不一致")
+    for anchor, anchor_id in zip(anchors, ids):
+        anchor.id = anchor_id
+
+    if folder_ids:
+        await conn.execute_many(
+            f'INSERT INTO "{FOLDER_THROUGH_TABLE}" ("fileanchor_id", "virtualfolder_id") VALUES (?, ?)',
+            [[anchor_id, folder_id] for anchor_id in ids for folder_id in folder_ids],
+        )
+    return ids
@@ -0,0 +1,149 @@
+"""
+目录导入：递归遍历一个根目录，把其中的文件作为资料锚点批量导入指定虚拟文件夹。
+
+遍历在工作线程中用 os.scandir 以生成器方式进行（显式栈，不递归），每次只取出 INGEST_CHUNK_SIZE 个文件：
+按 path 索引查出已是锚点的路径并跳过，其余在一个事务中批量插入锚点与文件夹关联。
+成功/跳过项只计数不保存逐项结果，内存占用与目录树大小无关。
+
+包含/排除规则为 glob（不区分大小写），同时匹配文件名与相对根目录的路径（以 / 分隔）：
+
+    include = ["*.pdf", "*.docx"]        # 为空表示全部文件
+    exclude = [".git", "node_modules", "*.tmp"]   # 命中的目录整棵跳过
+"""
+import asyncio
+import os
+from collections.abc import Iterator
+from fnmatch import fnmatchcase
+from itertools import islice
+
+from tortoise.transactions import in_transaction
+
+from utils.anchor_import import insert_anchors
+from utils.jobs import Job
+from utils.path_watch import get_watcher
+
+INGEST_CHUNK_SIZE = 1000
+SQL_CHUNK_SIZE = 900
+MAX_PATH_LENGTH = 1024
+MAX_NAME_LENGTH = 255
+
+
+def _normalize_patterns(patterns: list[str] | None) -> list[str]:
+    return [p.strip().replace("\\", "/").lower() for p in patterns or [] if p.strip()]
+
+
+def _matches(name: str, rel_path: str, patterns: list[str]) -> bool:
+    name, rel_path = name.lower(), rel_path.lower()
+    return any(fnmatchcase(name, p) or fnmatchcase(rel_path, p) for p in patterns)
+
+
+def iter_files(
+    root: str,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    stats: dict | None = None,
+) -> Iterator[tuple[str, str | None]]:
+    """
+    流式遍历 root 下符合规则的普通文件（不跟随符号链接）。阻塞调用。
+
+    :param stats: 若提供，累计 directories / files_seen / filtered 计数
+    :return: 生成 (路径, None)；无法读取的目录生成 (目录路径, 错误信息)
+    """
+    include = _normalize_patterns(include)
+    exclude = _normalize_patterns(exclude)
+    stats = stats if stats is not None else {}
+    for key in ("directories", "files_seen", "filtered"):
+        stats.setdefault(key, 0)
+    prefix = len(root.rstrip("/\\")) + 1
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                stats["directories"] += 1
+                for entry in entries:
+                    rel_path = entry.path[prefix:].replace("\\", "/")
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _matches(entry.name, rel_path, exclude):
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                    except OSError:
+                        continue
+                    stats["files_seen"] += 1
+                    if (include and not _matches(entry.name, rel_path, include)) or _matches(entry.name, rel_path, exclude):
+                        stats["filtered"] += 1
+                        continue
+                    yield entry.path, None
+        except OSError as exc:
+            yield directory, str(exc)
+
+
+def _take(iterator: Iterator, size: int) -> list:
+    return list(islice(iterator, size))
+
+
+async def _existing_paths(paths: list[str]) -> set[str]:
+    """按 path 索引查出已是资料锚点的路径。"""
+    from models import FileAnchor  # 延迟导入，避免循环引用
+
+    existing: set[str] = set()
+    for start in range(0, len(paths), SQL_CHUNK_SIZE):
+        chunk = paths[start:start + SQL_CHUNK_SIZE]
+        existing.update(await FileAnchor.filter(path__in=chunk).values_list("path", flat=True))
+    return existing
+
+
+async def run_ingest_job(
+    job: Job,
+    root: str,
+    folder_ids: list[int],
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+) -> None:
+    """
+    执行目录导入。遍历过程中 job.total 为 0（总数未知），结束时置为已处理数。
+
+    :param folder_ids: 新锚点要绑定的虚拟文件夹（“全部资料”与目标文件夹）
+    """
+    from models import FileAnchor  # 延迟导入，避免循环引用
+
+    walker = iter_files(root, include, exclude, job.stats)
+    try:
+        while not job.cancel_requested:
+            batch = await asyncio.to_thread(_take, walker, chunk_size)
+            if not batch:
+                break
+            paths = []
+            for path, error in batch:
+                if error is not None:
+                    job.add_result("failed", path=path, error=error)
+                elif len(path) > MAX_PATH_LENGTH:
+                    job.add_result("failed", path=path, error="路径过长")
+                else:
+                    paths.append(path)
+
+            existing = await _existing_paths(paths)
+            new_paths = [p for p in paths if p not in existing]
+            job.add_counts("skipped", len(paths) - len(new_paths))
+            if not new_paths:
+                continue
+            anchors = [
+                FileAnchor(name=os.path.basename(p)[:MAX_NAME_LENGTH], path=p, description="暂无描述") for p in new_paths
+            ]
+            async with in_transaction() as conn:
+                await insert_anchors(conn, anchors, folder_ids)
+            watcher = get_watcher()
+            if watcher is not None:
+                watcher.watch_anchors((anchor.id, anchor.path) for anchor in anchors)
+            job.add_counts("done", len(new_paths))
+    finally:
+        try:
+            walker.close()
+        except ValueError:  # 任务被强制取消时工作线程可能仍在遍历
+            pass
+        job.total = job.processed
@@ -0,0 +1,50 @@
+"""
+资料锚点关联关系批量加载工具，避免逐个锚点查询虚拟文件夹/标签（N+1 查询）。
+"""
+from collections.abc import Iterable
+
+from tortoise import connections
+
+# SQLite 单条语句绑定参数数量有限（旧版本为 999），超过时分批查询
+_SQLITE_MAX_VARIABLES = 900
+
+FOLDER_THROUGH_TABLE = "fileanchor_virtualfolder"
+TAG_THROUGH_TABLE = "fileanchor_tag"
+
+
+def _chunks(ids: list[int], size: int = _SQLITE_MAX_VARIABLES) -> Iterable[list[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+async def _load_links(table: str, column: str, anchor_ids: list[int]) -> dict[int, list[int]]:
+    """从中间表读取 fileanchor_id -> 关联 ID 列表，并在内存中分组。"""
+    grouped: dict[int, list[int]] = {anchor_id: [] for anchor_id in anchor_ids}
+    if not anchor_ids:
+        return grouped
+
+    conn = connections.get("default")
+    for chunk in _chunks(anchor_ids):
+        placeholders = ",".join("?" * len(chunk))
+        rows = await conn.execute_query_dict(
+            f'SELECT "fileanchor_id", "{column}" FROM "{table}" '
+            f'WHERE "fileanchor_id" IN ({placeholders}) '
+            f'ORDER BY "fileanchor_id", "{column}"',
+            chunk,
+        )
+        for row in rows:
+            grouped[row["fileanchor_id"]].append(row[column])
+    return grouped
+
+
+async def load_anchor_relations(anchor_ids: Iterable[int]) -> tuple[dict[int, list[int]], dict[int, list[int]]]:
+    """
+    批量加载一组锚点绑定的虚拟文件夹 ID 与标签 ID。
+
+    :param anchor_ids: 锚点 ID 列表（自动去重）
+    :return: (folder_map, tag_map)，键为锚点 ID，值为关联 ID 列表；无关联时为空列表
+    """
+    ids = list(dict.fromkeys(anchor_ids))
+    folder_map = await _load_links(FOLDER_THROUGH_TABLE, "virtualfolder_id", ids)
+    tag_map = await _load_links(TAG_THROUGH_TABLE, "tag_id", ids)
+    return folder_map, tag_map
@@ -0,0 +1,169 @@
+"""
+资料锚点全文检索：SQLite FTS5 外部内容表镜像 FileAnchor 的 name / description / path，
+由触发器在增删改时同步。
+
+使用 trigram 分词器，按任意连续 3 个字符建索引，中文名称无需分词即可做子串匹配（前缀匹配自然包含在内），
+不区分大小写。不足 3 个字符的关键词（如两个汉字）无法走 trigram 索引，改为在已命中的结果上做 LIKE 过滤；
+查询只有短词时退化为对检索表的 LIKE 扫描（耗时随锚点数线性增长，10 万级约数十到数百毫秒），
+无 bm25 相关度，仅按“名称命中优先、新建优先”排序。该限制写在 GET /anchors/search 的接口说明中。
+
+运行环境的 SQLite 不支持 FTS5 / trigram（低于 3.34）时不建检索表，检索整体回退到 FileAnchor 上的 LIKE 查询。
+"""
+from loguru import logger
+from tortoise import connections
+
+FTS_TABLE = "fileanchor_fts"
+TRIGRAM_MIN_LENGTH = 3
+MAX_TERMS = 16
+# bm25 列权重：名称 > 描述 > 路径
+RANK_WEIGHTS = (10.0, 2.0, 1.0)
+
+_FTS_DDL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5(
+    name, description, path,
+    content='fileanchor', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "fileanchor" BEGIN
+    INSERT INTO "{FTS_TABLE}"(rowid, name, description, path) VALUES (new.id, new.name, new.description, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "fileanchor" BEGIN
+    INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, name, description, path)
+    VALUES ('delete', old.id, old.name, old.description, old.path);
+END;
+CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au" AFTER UPDATE OF name, description, path ON "fileanchor" BEGIN
+    INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, name, description, path)
+    VALUES ('delete', old.id, old.name, old.description, old.path);
+    INSERT INTO "{FTS_TABLE}"(rowid, name, description, path) VALUES (new.id, new.name, new.description, new.path);
+END;
+"""
+
+_fts_available = False
+
+
+async def ensure_search_index() -> bool:
+    """
+    创建检索表与同步触发器（已存在则跳过）；首次创建时从 fileanchor 全量重建索引。
+    返回当前是否可用 FTS5 检索。
+    """
+    global _fts_available
+
+    conn = connections.get("default")
+    rows = await conn.execute_query_dict("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", [FTS_TABLE])
+    try:
+        await conn.execute_script(_FTS_DDL)
+    except Exception as exc:  # noqa: BLE001 - SQLite 未编译 FTS5 或不支持 trigram
+        logger.warning("FTS5 全文检索不可用，搜索将回退到 LIKE 查询: {}", exc)
+        _fts_available = False
+        return False
+    if not rows:
+        await conn.execute_script(f"INSERT INTO \"{FTS_TABLE}\"(\"{FTS_TABLE}\") VALUES ('rebuild')")
+    _fts_available = True
+    return True
+
+
+def split_terms(query: str) -> list[str]:
+    """按空白拆分关键词，去重并限制数量。"""
+    return list(dict.fromkeys(query.split()))[:MAX_TERMS]
+
+
+def _fts_phrase(term: str) -> str:
+    """把关键词转成 FTS5 短语（双引号包裹，内部双引号转义），避免用户输入被解析为查询语法。"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _filter_clauses(
+    alias: str,
+    folder_id: int | None,
+    tag_ids: list[int],
+    recycle_folder_id: int | None,
+) -> tuple[list[str], list]:
+    """文件夹、标签（需全部命中）与回收站过滤条件。"""
+    clauses: list[str] = []
+    params: list = []
+    if folder_id is not None:
+        clauses.append(
+            f'EXISTS (SELECT 1 FROM "fileanchor_virtualfolder" fv '
+            f"WHERE fv.fileanchor_id = {alias} AND fv.virtualfolder_id = ?)"
+        )
+        params.append(folder_id)
+    if tag_ids:
+        placeholders = ",".join("?" for _ in tag_ids)
+        clauses.append(
+            f'(SELECT COUNT(*) FROM "fileanchor_tag" ft '
+            f"WHERE ft.fileanchor_id = {alias} AND ft.tag_id IN ({placeholders})) = ?"
+        )
+        params.extend(tag_ids)
+        params.append(len(tag_ids))
+    if recycle_folder_id is not None:
+        clauses.append(
+            f'NOT EXISTS (SELECT 1 FROM "fileanchor_virtualfolder" rv '
+            f"WHERE rv.fileanchor_id = {alias} AND rv.virtualfolder_id = ?)"
+        )
+        params.append(recycle_folder_id)
+    return clauses, params
+
+
+async def search_anchor_ids(
+    query: str,
+    limit: int = 20,
+    folder_id: int | None = None,
+    tag_ids: list[int] | None = None,
+    recycle_folder_id: int | None = None,
+) -> list[int]:
+    """
+    检索资料锚点，返回按相关度排序的前 limit 个锚点 ID。多个关键词之间为“且”。
+
+    :param folder_id: 仅检索该虚拟文件夹下的锚点
+    :param tag_ids: 仅检索同时带有这些标签的锚点
+    :param recycle_folder_id: 排除该文件夹（回收站）中的锚点；None 表示不排除
+    """
+    terms = split_terms(query)
+    if not terms:
+        return []
+    tag_ids = list(dict.fromkeys(tag_ids or []))
+    conn = connections.get("default")
+
+    if not _fts_available:
+        clauses = [
+            "(a.name LIKE ? ESCAPE '\\' OR a.description LIKE ? ESCAPE '\\' OR a.path LIKE ? ESCAPE '\\')" for _ in terms
+        ]
+        like_params = [pattern for term in terms for pattern in (_like_pattern(term),) * 3]
+        filters, filter_params = _filter_clauses("a.id", folder_id, tag_ids, recycle_folder_id)
+        rows = await conn.execute_query_dict(
+            f'SELECT a.id FROM "fileanchor" a WHERE {" AND ".join(clauses + filters)} ORDER BY a.id DESC LIMIT ?',
+            like_params + filter_params + [limit],
+        )
+        return [row["id"] for row in rows]
+
+    long_terms = [t for t in terms if len(t) >= TRIGRAM_MIN_LENGTH]
+    short_terms = [t for t in terms if len(t) < TRIGRAM_MIN_LENGTH]
+    where: list[str] = []
+    params: list = []
+    if long_terms:
+        where.append(f'"{FTS_TABLE}" MATCH ?')
+        params.append(" AND ".join(_fts_phrase(t) for t in long_terms))
+    for term in short_terms:
+        where.append(
+            "(name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\' OR path LIKE ? ESCAPE '\\')"
+        )
+        params.extend((_like_pattern(term),) * 3)
+    clauses, filter_params = _filter_clauses(f'"{FTS_TABLE}".rowid', folder_id, tag_ids, recycle_folder_id)
+    where.extend(clauses)
+    params.extend(filter_params)
+    if long_terms:
+        order = f"bm25(\"{FTS_TABLE}\", {', '.join(map(str, RANK_WEIGHTS))}), rowid DESC"
+        order_params: list = []
+    else:
+        # 只有短词时没有 bm25 可用：名称命中的排在前面
+        order = " + ".join("(name LIKE ? ESCAPE '\\')" for _ in short_terms) + " DESC, rowid DESC"
+        order_params = [_like_pattern(t) for t in short_terms]
+    rows = await conn.execute_query_dict(
+        f'SELECT rowid AS id FROM "{FTS_TABLE}" WHERE {" AND ".join(where)} ORDER BY {order} LIMIT ?',
+        params + order_params + [limit],
+    )
+    return [row["id"] for row in rows]
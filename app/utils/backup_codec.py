@@ -0,0 +1,98 @@
+"""
+备份压缩：可选用标准库 zlib / lzma 对整文件备份做流式压缩。
+
+    [backup]
+    compression = "zlib"    # none / zlib / lzma，默认 none
+    compression_level = 6   # zlib 为 0-9，lzma 为 0-9（preset）
+
+已经是压缩格式的文件（按扩展名与文件头魔数判断）不再压缩，直接原样保存。
+"""
+import lzma
+import zlib
+from pathlib import Path
+
+CODEC_NONE = "none"
+CODECS = (CODEC_NONE, "zlib", "lzma")
+DEFAULT_LEVEL = {"zlib": 6, "lzma": 6}
+SNIFF_SIZE = 16
+
+# 常见的已压缩格式：压缩包、Office Open XML（本身是 zip）、图片、音视频
+COMPRESSED_SUFFIXES = frozenset(
+    {
+        ".zip", ".gz", ".tgz", ".bz2", ".xz", ".lzma", ".zst", ".7z", ".rar",
+        ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".epub", ".jar", ".apk",
+        ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+        ".mp3", ".aac", ".m4a", ".ogg", ".flac", ".opus",
+        ".mp4", ".m4v", ".mkv", ".mov", ".avi", ".webm",
+    }
+)
+_MAGIC_PREFIXES = (
+    b"PK\x03\x04",  # zip 及基于 zip 的格式
+    b"\x1f\x8b",  # gzip
+    b"BZh",  # bzip2
+    b"\xfd7zXZ\x00",  # xz
+    b"7z\xbc\xaf\x27\x1c",  # 7z
+    b"Rar!",  # rar
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"\xff\xd8\xff",  # jpeg
+    b"\x89PNG",  # png
+    b"GIF8",  # gif
+    b"ID3",  # mp3
+    b"OggS",  # ogg
+    b"fLaC",  # flac
+    b"\x1a\x45\xdf\xa3",  # mkv / webm
+)
+
+
+def load_compression_options() -> tuple[str, int | None]:
+    """读取 settings.toml 中的压缩设置，返回 (codec, level)；未配置或无效时为 ("none", None)。"""
+    from utils.settings import load_settings
+
+    options = load_settings().get("backup", {})
+    if not isinstance(options, dict):
+        return CODEC_NONE, None
+    codec = str(options.get("compression", CODEC_NONE)).lower()
+    if codec not in CODECS:
+        return CODEC_NONE, None
+    try:
+        level = int(options.get("compression_level", DEFAULT_LEVEL.get(codec, 0)))
+    except (TypeError, ValueError):
+        level = DEFAULT_LEVEL.get(codec)
+    return codec, level
+
+
+def is_precompressed(path: Path, head: bytes) -> bool:
+    """按扩展名或文件头魔数判断文件是否已是压缩格式。"""
+    if path.suffix.lower() in COMPRESSED_SUFFIXES:
+        return True
+    if head.startswith(_MAGIC_PREFIXES):
+        return True
+    # RIFF 容器（webp / avi / wav），wav 未压缩，其余跳过
+    if head[:4] == b"RIFF" and head[8:12] in (b"WEBP", b"AVI "):
+        return True
+    # ISO BMFF（mp4 / mov / heic）：第 4 字节起为 ftyp
+    return head[4:8] == b"ftyp"
+
+
+def sniff(path: Path) -> bytes:
+    """读取文件头若干字节。阻塞调用。"""
+    with open(path, "rb") as fh:
+        return fh.read(SNIFF_SIZE)
+
+
+def compressor(codec: str, level: int | None = None):
+    """返回流式压缩器（compress / flush 接口）。"""
+    if codec == "zlib":
+        return zlib.compressobj(DEFAULT_LEVEL["zlib"] if level is None else max(0, min(9, level)))
+    if codec == "lzma":
+        return lzma.LZMACompressor(preset=DEFAULT_LEVEL["lzma"] if level is None else max(0, min(9, level)))
+    raise ValueError(f"unknown codec: {codec}")
+
+
+def decompressor(codec: str):
+    """返回流式解压器（decompress 接口）。"""
+    if codec == "zlib":
+        return zlib.decompressobj()
+    if codec == "lzma":
+        return lzma.LZMADecompressor()
+    raise ValueError(f"unknown codec: {codec}")
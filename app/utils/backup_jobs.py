@@ -0,0 +1,192 @@
+"""
+批量备份任务：一次枚举全部资料锚点，在线程池中并发复制（总并发与单设备并发双重限制），
+备份记录攒批插入（入库失败的记录归还其 blob 引用并记为失败），结束时只写一条汇总日志。
+
+增量模式下先比较源文件当前的 stat 与最近一次备份记录的指纹（大小 + 修改时间），
+未变化的文件直接跳过；可选在大小相同、修改时间不同时再比较内容哈希。
+"""
+import asyncio
+import os
+import stat
+from collections import defaultdict
+from pathlib import Path
+
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+
+from utils.backup_store import hash_file, release_backups, store_backup_content
+from utils.jobs import Job
+
+DEFAULT_PARALLELISM = 4
+DEFAULT_PER_DEVICE = 2  # 同一磁盘上同时复制的文件数，机械硬盘/网络盘并发过高反而更慢
+RECORD_BATCH_SIZE = 200
+WINDOW_SIZE = 500  # 每次 stat 并调度的锚点数，避免一次创建数万个协程
+
+
+def load_backup_job_options() -> tuple[int, int]:
+    """
+    读取 settings.toml 中的批量备份参数，缺省时使用默认值：
+
+        [backup]
+        parallelism = 4
+        per_device_parallelism = 2
+    """
+    from utils.settings import load_settings
+
+    options = load_settings().get("backup", {})
+    try:
+        parallelism = max(1, int(options.get("parallelism", DEFAULT_PARALLELISM)))
+        per_device = max(1, int(options.get("per_device_parallelism", DEFAULT_PER_DEVICE)))
+    except (TypeError, ValueError, AttributeError):
+        return DEFAULT_PARALLELISM, DEFAULT_PER_DEVICE
+    return parallelism, min(per_device, parallelism)
+
+
+def _probe_sources(paths: list[str]) -> dict[str, os.stat_result | None]:
+    """在工作线程中 stat 一批源文件；不存在或不是普通文件时为 None。"""
+    stats: dict[str, os.stat_result | None] = {}
+    for path in paths:
+        try:
+            st = os.stat(Path(path).expanduser())
+        except OSError:
+            stats[path] = None
+            continue
+        stats[path] = st if stat.S_ISREG(st.st_mode) else None
+    return stats
+
+
+async def latest_fingerprints(anchor_ids: list[int]) -> dict[int, tuple[int | None, int | None, str | None, int]]:
+    """
+    一条查询取出每个锚点最近一次备份的指纹。
+
+    :return: 锚点 ID -> (源文件大小, 修改时间纳秒, 内容哈希, 备份记录 ID)
+    """
+    from tortoise import connections
+
+    if not anchor_ids:
+        return {}
+    placeholders = ",".join("?" for _ in anchor_ids)
+    rows = await connections.get("default").execute_query_dict(
+        f"""
+        SELECT r.id, r.file_anchor_id, r.source_size, r.source_mtime_ns, r.content_hash
+        FROM backuprecord r
+        JOIN (
+            SELECT file_anchor_id, MAX(backup_time) AS latest
+            FROM backuprecord
+            WHERE file_anchor_id IN ({placeholders})
+            GROUP BY file_anchor_id
+        ) m ON r.file_anchor_id = m.file_anchor_id AND r.backup_time = m.latest
+        """,
+        list(anchor_ids),
+    )
+    return {
+        row["file_anchor_id"]: (row["source_size"], row["source_mtime_ns"], row["content_hash"], row["id"])
+        for row in rows
+    }
+
+
+async def run_backup_job(
+    job: Job,
+    anchors: list[tuple[int, str]],
+    backup_root: Path,
+    mode: str = "full",
+    parallelism: int = DEFAULT_PARALLELISM,
+    per_device: int = DEFAULT_PER_DEVICE,
+    incremental: bool = False,
+    verify_hash: bool = False,
+    codec: str = "none",
+    level: int | None = None,
+) -> None:
+    """
+    执行批量备份。
+
+    :param anchors: [(锚点 ID, 路径)]
+    :param incremental: 只备份与最近一次备份指纹不同的文件
+    :param verify_hash: 增量模式下，大小相同但修改时间不同的文件再比较内容哈希，内容未变则跳过
+    :param codec: 整文件备份的压缩方式，见 utils.backup_codec
+    """
+    from models import BackupRecord  # 延迟导入，避免循环引用
+
+    slots = asyncio.Semaphore(parallelism)
+    device_slots: dict[int, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_device))
+    # (未入库的备份记录, 结果字段)：blob 引用在写入内容时已登记，记录入库成功后才记为 done
+    pending: list[tuple] = []
+
+    async def discard(batch: list[tuple], error: str) -> None:
+        """记录未能入库：归还其 blob 引用，结果记为失败。"""
+        await release_backups([rec for rec, _ in batch])
+        for _, result in batch:
+            job.add_result("failed", anchor_id=result["anchor_id"], path=result["path"], error=error)
+
+    async def flush() -> None:
+        if not pending:
+            return
+        batch = pending[:]
+        pending.clear()
+        try:
+            async with in_transaction():
+                await BackupRecord.bulk_create([rec for rec, _ in batch], batch_size=RECORD_BATCH_SIZE)
+        except asyncio.CancelledError:
+            # 强制取消时整批未入库，确保引用归还完成后再退出
+            await asyncio.shield(discard(batch, "任务已取消"))
+            raise
+        except Exception:  # noqa: BLE001 - 整批失败（如锚点在任务期间被删除）时逐条重试，只丢弃真正失败的记录
+            for rec, result in batch:
+                try:
+                    await rec.save()
+                except Exception as exc:  # noqa: BLE001
+                    await discard([(rec, result)], str(exc))
+                else:
+                    job.add_result("done", **result)
+            return
+        for _, result in batch:
+            job.add_result("done", **result)
+
+    async def backup_one(anchor_id: int, path: str, st: os.stat_result | None, previous: tuple | None) -> None:
+        if st is None:
+            job.add_result("failed", anchor_id=anchor_id, path=path, error="资料文件不存在")
+            return
+        if previous is not None and previous[0] == st.st_size and previous[1] == st.st_mtime_ns:
+            job.add_result("skipped", anchor_id=anchor_id, path=path, reason="unchanged")
+            return
+        # 先占设备名额再占总名额，等待慢盘时不占用其他设备的并发
+        async with device_slots[st.st_dev], slots:
+            if job.cancel_requested:
+                return
+            try:
+                source = Path(path).expanduser()
+                if verify_hash and previous is not None and previous[0] == st.st_size and previous[2]:
+                    content_hash, _ = await asyncio.to_thread(hash_file, source)
+                    if content_hash == previous[2]:
+                        # 内容未变只是修改时间变了：更新指纹，之后的增量备份按 stat 即可跳过，不必再次哈希
+                        await BackupRecord.filter(id=previous[3]).update(source_mtime_ns=st.st_mtime_ns)
+                        job.add_result("skipped", anchor_id=anchor_id, path=path, reason="same_content")
+                        return
+                fields = await store_backup_content(source, backup_root, mode, codec, level)
+            except Exception as exc:  # noqa: BLE001 - 单个文件失败不影响其余文件
+                job.add_result("failed", anchor_id=anchor_id, path=path, error=str(exc))
+                return
+        result = {
+            "anchor_id": anchor_id,
+            "path": path,
+            "file_name": fields["file_name"],
+            "content_hash": fields["content_hash"],
+            "storage": fields["storage"],
+            "codec": fields.get("codec", "none"),
+        }
+        pending.append((BackupRecord(file_anchor_id=anchor_id, backup_time=timezone.now(), **fields), result))
+        if len(pending) >= RECORD_BATCH_SIZE:
+            await flush()
+
+    try:
+        for start in range(0, len(anchors), WINDOW_SIZE):
+            if job.cancel_requested:
+                break
+            window = anchors[start:start + WINDOW_SIZE]
+            stats = await asyncio.to_thread(_probe_sources, [path for _, path in window])
+            previous = await latest_fingerprints([aid for aid, _ in window]) if incremental else {}
+            await asyncio.gather(
+                *(backup_one(aid, path, stats[path], previous.get(aid)) for aid, path in window)
+            )
+    finally:
+        await flush()
@@ -0,0 +1,118 @@
+"""
+备份保留策略：按 settings.toml 中的规则清理旧备份版本。
+
+    [backup.retention]
+    keep_last = 10      # 每个资料锚点保留最近 10 个版本
+    keep_daily = 7      # 另外保留最近 7 个有备份的日子里各自最新的版本
+    keep_weekly = 4     # 最近 4 个有备份的周
+    keep_monthly = 6    # 最近 6 个有备份的月
+    auto_prune = false  # 定期备份（/backups/sweep）完成后自动清理
+
+满足任意一条规则的版本都会保留；未配置任何规则时不清理。
+待清理的版本由一条窗口函数查询一次算出，再分批释放（批量删除记录，工作线程池删除文件）。
+"""
+from dataclasses import dataclass
+
+from utils.jobs import Job
+
+PRUNE_BATCH_SIZE = 500
+
+# 时间按存储时的本地时间取日/周/月（截掉时区后缀，避免 strftime 换算成 UTC 跨日）
+_LOCAL_TIME = "substr(backup_time, 1, 19)"
+_DAY = "substr(backup_time, 1, 10)"
+_WEEK = f"strftime('%Y-%W', {_LOCAL_TIME})"
+_MONTH = "substr(backup_time, 1, 7)"
+
+_PRUNE_SQL = f"""
+WITH ranked AS (
+    SELECT
+        id,
+        ROW_NUMBER() OVER (PARTITION BY file_anchor_id ORDER BY backup_time DESC, id DESC) AS rn,
+        ROW_NUMBER() OVER (PARTITION BY file_anchor_id, {_DAY} ORDER BY backup_time DESC, id DESC) AS day_rn,
+        DENSE_RANK() OVER (PARTITION BY file_anchor_id ORDER BY {_DAY} DESC) AS day_rank,
+        ROW_NUMBER() OVER (PARTITION BY file_anchor_id, {_WEEK} ORDER BY backup_time DESC, id DESC) AS week_rn,
+        DENSE_RANK() OVER (PARTITION BY file_anchor_id ORDER BY {_WEEK} DESC) AS week_rank,
+        ROW_NUMBER() OVER (PARTITION BY file_anchor_id, {_MONTH} ORDER BY backup_time DESC, id DESC) AS month_rn,
+        DENSE_RANK() OVER (PARTITION BY file_anchor_id ORDER BY {_MONTH} DESC) AS month_rank
+    FROM backuprecord
+)
+SELECT id FROM ranked
+WHERE NOT (
+    rn <= ?
+    OR (day_rn = 1 AND day_rank <= ?)
+    OR (week_rn = 1 AND week_rank <= ?)
+    OR (month_rn = 1 AND month_rank <= ?)
+)
+ORDER BY id
+"""
+
+
+@dataclass
+class RetentionPolicy:
+    """备份保留策略；各项为 0 表示不启用该规则。"""
+
+    keep_last: int = 0
+    keep_daily: int = 0
+    keep_weekly: int = 0
+    keep_monthly: int = 0
+    auto_prune: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return any((self.keep_last, self.keep_daily, self.keep_weekly, self.keep_monthly))
+
+
+def load_retention_policy() -> RetentionPolicy:
+    """读取 settings.toml 中的 [backup.retention]；格式错误时视为未配置。"""
+    from utils.settings import load_settings
+
+    options = load_settings().get("backup", {})
+    options = options.get("retention", {}) if isinstance(options, dict) else {}
+    try:
+        return RetentionPolicy(
+            keep_last=max(0, int(options.get("keep_last", 0))),
+            keep_daily=max(0, int(options.get("keep_daily", 0))),
+            keep_weekly=max(0, int(options.get("keep_weekly", 0))),
+            keep_monthly=max(0, int(options.get("keep_monthly", 0))),
+            auto_prune=bool(options.get("auto_prune", False)),
+        )
+    except (TypeError, ValueError, AttributeError):
+        return RetentionPolicy()
+
+
+async def find_expired_backups(policy: RetentionPolicy) -> list[int]:
+    """按保留策略找出所有锚点中应清理的备份记录 ID（一条窗口函数查询）。"""
+    from tortoise import connections
+
+    if not policy.enabled:
+        return []
+    rows = await connections.get("default").execute_query_dict(
+        _PRUNE_SQL, [policy.keep_last, policy.keep_daily, policy.keep_weekly, policy.keep_monthly]
+    )
+    return [row["id"] for row in rows]
+
+
+async def prune_backups(job: Job, policy: RetentionPolicy, dry_run: bool = False) -> None:
+    """
+    执行清理：分批释放过期备份（同一批在一个事务中批量删除记录，引用归零的文件在线程池中删除）。
+    dry_run 时只统计不删除。
+    """
+    from models import BackupRecord  # 延迟导入，避免循环引用
+    from utils.backup_store import release_backups
+
+    expired = await find_expired_backups(policy)
+    job.total = len(expired)
+    for start in range(0, len(expired), PRUNE_BATCH_SIZE):
+        if job.cancel_requested:
+            break
+        batch = expired[start:start + PRUNE_BATCH_SIZE]
+        records = await BackupRecord.filter(id__in=batch)
+        if not dry_run:
+            await release_backups(records)
+        for rec in records:
+            job.add_result(
+                "done",
+                backup_id=rec.id,
+                anchor_id=rec.file_anchor_id,
+                backup_time=rec.backup_time,
+            )
@@ -0,0 +1,488 @@
+"""
+备份文件读写管线：在工作线程中分块流式复制，边复制边计算内容哈希，
+先写入同目录临时文件，完成后原子重命名到目标位置，避免留下半截文件。
+
+备份内容按哈希存放在备份根目录下的 blobs/ 中（内容寻址），内容相同的备份只保存一份，
+由 BackupBlob.ref_count 记录引用数，最后一个引用删除时才删除文件。
+blob 可按设置压缩存放，哈希始终针对原始内容。
+"""
+import asyncio
+import hashlib
+import lzma
+import os
+import shutil
+import time
+import uuid
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils import backup_codec
+
+COPY_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MiB
+HASH_ALGORITHM = "sha256"
+BLOB_DIR_NAME = "blobs"
+SQL_CHUNK_SIZE = 900  # 单条语句的参数个数上限（SQLite 默认 999）
+UNLINK_WORKERS = 4
+UNLINK_SLICE_SIZE = 64
+
+# 串行化 blob 的落盘与引用计数变更，避免“引用归零删除文件”与“复用同一 blob”交错
+_blob_lock = asyncio.Lock()
+
+
+class BackupIntegrityError(Exception):
+    """复制过程中计算出的哈希与期望值不一致（备份文件损坏或被篡改）。"""
+
+
+def _temp_path(dest: Path) -> Path:
+    return dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+
+
+def _decompress_bounded(decoder, data) -> Iterator[bytes]:
+    """
+    解压一块输入，每次最多产出 COPY_CHUNK_SIZE 字节，高压缩比的数据也不会一次展开到内存中。
+    zlib 未消费的输入留在 unconsumed_tail；lzma 由解压器内部缓存，needs_input 为假时继续取输出。
+    """
+    if isinstance(decoder, lzma.LZMADecompressor):
+        while not decoder.eof:
+            out = decoder.decompress(data, max_length=COPY_CHUNK_SIZE)
+            data = b""
+            if out:
+                yield out
+            if decoder.needs_input:
+                return
+        return
+    while data:
+        out = decoder.decompress(data, COPY_CHUNK_SIZE)
+        data = decoder.unconsumed_tail
+        if out:
+            yield out
+
+
+def _stream_copy(source: Path, tmp: Path, compress: tuple | None = None, decompress: str | None = None) -> tuple[str, int]:
+    """
+    分块复制 source 到 tmp 并落盘，返回 (内容哈希, 字节数)。哈希与字节数始终针对未压缩的内容。
+
+    :param compress: (codec, level)，写入时压缩
+    :param decompress: codec，读取时解压
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    size = 0
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    encoder = backup_codec.compressor(*compress) if compress else None
+    decoder = backup_codec.decompressor(decompress) if decompress else None
+    with open(source, "rb") as src, open(tmp, "wb") as dst:
+        while True:
+            n = src.readinto(buffer)
+            if not n:
+                break
+            if decoder is not None:
+                for data in _decompress_bounded(decoder, view[:n]):
+                    digest.update(data)
+                    dst.write(data)
+                    size += len(data)
+                continue
+            digest.update(view[:n])
+            dst.write(encoder.compress(view[:n]) if encoder is not None else view[:n])
+            size += n
+        if encoder is not None:
+            dst.write(encoder.flush())
+        if decoder is not None:
+            flush = getattr(decoder, "flush", None)  # zlib 解压器需要 flush，lzma 没有
+            if flush is not None:
+                data = flush()
+                digest.update(data)
+                dst.write(data)
+                size += len(data)
+        dst.flush()
+        os.fsync(dst.fileno())
+    return digest.hexdigest(), size
+
+
+def copy_file_hashed(
+    source: Path, dest: Path, expected_hash: str | None = None, codec: str | None = None
+) -> tuple[str, int]:
+    """
+    流式复制 source 到 dest 并返回 (内容哈希, 字节数)。阻塞调用，应通过 asyncio.to_thread 执行。
+
+    :param expected_hash: 若提供，复制完成后校验哈希，不一致则放弃写入并抛出 BackupIntegrityError
+    :param codec: source 的压缩方式，非 none 时边读边解压
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _temp_path(dest)
+    try:
+        decompress = codec if codec and codec != backup_codec.CODEC_NONE else None
+        content_hash, size = _stream_copy(source, tmp, decompress=decompress)
+        if expected_hash and content_hash != expected_hash:
+            raise BackupIntegrityError(f"hash mismatch: expected {expected_hash}, got {content_hash}")
+        shutil.copystat(source, tmp)
+        os.replace(tmp, dest)
+    except (zlib.error, lzma.LZMAError) as exc:
+        tmp.unlink(missing_ok=True)
+        raise BackupIntegrityError(f"decompress failed: {exc}") from exc
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return content_hash, size
+
+
+def hash_file(source: Path) -> tuple[str, int]:
+    """只读计算文件哈希，返回 (内容哈希, 字节数)。阻塞调用。"""
+    digest = hashlib.new(HASH_ALGORITHM)
+    size = 0
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(source, "rb") as src:
+        while True:
+            n = src.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+            size += n
+    return digest.hexdigest(), size
+
+
+def blob_path(backup_root: Path, content_hash: str) -> Path:
+    """blob 存储位置：<备份根目录>/blobs/<哈希前两位>/<哈希>。"""
+    return backup_root / BLOB_DIR_NAME / content_hash[:2] / content_hash
+
+
+def _copy_to_staging(
+    source: Path, backup_root: Path, codec: str = "none", level: int | None = None
+) -> tuple[Path, str, int, str]:
+    """
+    把 source 复制到 blobs/ 下的临时文件，返回 (临时文件, 内容哈希, 字节数, 实际使用的压缩方式)。阻塞调用。
+    已是压缩格式的文件不再压缩。
+    """
+    staging = backup_root / BLOB_DIR_NAME
+    staging.mkdir(parents=True, exist_ok=True)
+    if codec != backup_codec.CODEC_NONE and backup_codec.is_precompressed(source, backup_codec.sniff(source)):
+        codec = backup_codec.CODEC_NONE
+    tmp = staging / f".{uuid.uuid4().hex}.tmp"
+    try:
+        compress = (codec, level) if codec != backup_codec.CODEC_NONE else None
+        content_hash, size = _stream_copy(source, tmp, compress=compress)
+        shutil.copystat(source, tmp)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return tmp, content_hash, size, codec
+
+
+def _commit_staging(tmp: Path, dest: Path) -> None:
+    """把临时文件放到 blob 位置；blob 已存在（内容相同）时丢弃临时文件。"""
+    if dest.is_file():
+        tmp.unlink(missing_ok=True)
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, dest)
+
+
+async def _acquire_blob(content_hash: str, size: int, path: Path, codec: str = "none"):
+    """
+    引用计数 +1；blob 记录不存在时创建。需在 _blob_lock 与事务内调用。
+
+    :return: (blob, 是否新建)
+    """
+    from tortoise.expressions import F
+
+    from models import BackupBlob  # 延迟导入，避免循环引用
+
+    updated = await BackupBlob.filter(content_hash=content_hash).update(ref_count=F("ref_count") + 1)
+    if updated:
+        return await BackupBlob.get(content_hash=content_hash), False
+    blob = await BackupBlob.create(content_hash=content_hash, blob_path=str(path), size=size, ref_count=1, codec=codec)
+    return blob, True
+
+
+async def _adjust_chunk_refs(counts: dict[str, int]) -> None:
+    """按块哈希批量调整引用计数（相同增量的块合并为一条 UPDATE）。需在事务内调用。"""
+    from collections import defaultdict
+
+    from tortoise.expressions import F
+
+    from models import BackupChunk  # 延迟导入，避免循环引用
+
+    by_delta: dict[int, list[str]] = defaultdict(list)
+    for content_hash, delta in counts.items():
+        by_delta[delta].append(content_hash)
+    for delta, hashes in by_delta.items():
+        for start in range(0, len(hashes), SQL_CHUNK_SIZE):
+            await BackupChunk.filter(content_hash__in=hashes[start:start + SQL_CHUNK_SIZE]).update(
+                ref_count=F("ref_count") + delta
+            )
+
+
+async def _acquire_chunks(manifest: dict, backup_root: Path) -> None:
+    """新块清单入库：清单中出现的每个块引用计数 +1，块记录不存在时批量创建。需在事务内调用。"""
+    from utils.backup_chunks import chunk_path
+
+    from models import BackupChunk  # 延迟导入，避免循环引用
+
+    sizes = {content_hash: size for content_hash, size in manifest["chunks"]}
+    hashes = list(sizes)
+    existing: set[str] = set()
+    for start in range(0, len(hashes), SQL_CHUNK_SIZE):
+        existing.update(
+            await BackupChunk.filter(content_hash__in=hashes[start:start + SQL_CHUNK_SIZE]).values_list(
+                "content_hash", flat=True
+            )
+        )
+    await _adjust_chunk_refs({content_hash: 1 for content_hash in existing})
+    fresh = [
+        BackupChunk(
+            content_hash=content_hash,
+            chunk_path=str(chunk_path(backup_root, content_hash)),
+            size=sizes[content_hash],
+            ref_count=1,
+        )
+        for content_hash in hashes
+        if content_hash not in existing
+    ]
+    if fresh:
+        await BackupChunk.bulk_create(fresh, batch_size=SQL_CHUNK_SIZE)
+
+
+async def _store_delta(source: Path, backup_root: Path) -> dict:
+    """
+    块级增量备份：按内容切分文件，只写入块库中还没有的块，块清单作为 blob 保存。
+    文件未变化时清单相同，直接复用已有清单 blob。
+    """
+    from tortoise.transactions import in_transaction
+
+    from utils.backup_chunks import chunk_path, dump_manifest, missing_chunks, store_chunks, write_atomic
+
+    from models import BackupBlob  # 延迟导入，避免循环引用
+
+    manifest = await asyncio.to_thread(store_chunks, source, backup_root)
+    async with _blob_lock:
+        # 块写入发生在加锁之前，期间并发的删除可能刚好释放了同名块，缺失时在锁内重新写入
+        paths = [chunk_path(backup_root, content_hash) for content_hash, _ in manifest["chunks"]]
+        if await asyncio.to_thread(missing_chunks, paths):
+            manifest = await asyncio.to_thread(store_chunks, source, backup_root)
+
+        data = dump_manifest(manifest)
+        manifest_hash = hashlib.new(HASH_ALGORITHM, data).hexdigest()
+        blob = await BackupBlob.filter(content_hash=manifest_hash).first()
+        dest = Path(blob.blob_path) if blob else blob_path(backup_root, manifest_hash)
+        if not await asyncio.to_thread(dest.is_file):
+            await asyncio.to_thread(write_atomic, dest, data)
+
+        async with in_transaction():
+            blob, created = await _acquire_blob(manifest_hash, len(data), dest)
+            if created:
+                await _acquire_chunks(manifest, backup_root)
+    return {"blob_id": blob.id, "backup_path": blob.blob_path, "content_hash": manifest["hash"], "storage": "delta"}
+
+
+async def _store_full(source: Path, backup_root: Path, size: int, codec: str = "none", level: int | None = None) -> dict:
+    """
+    整文件备份：
+    - 已有相同大小的 blob 时先只读计算哈希，命中则无需复制（沿用已有 blob 的压缩方式）；
+    - 否则边复制边计算哈希（按需压缩），写入 blobs/ 临时文件后再按哈希落位。
+    """
+    from tortoise.transactions import in_transaction
+
+    from models import BackupBlob  # 延迟导入，避免循环引用
+
+    async def _acquire(content_hash: str, path: Path, codec: str) -> dict:
+        async with in_transaction():
+            blob, _ = await _acquire_blob(content_hash, size, path, codec)
+        return {
+            "blob_id": blob.id,
+            "backup_path": blob.blob_path,
+            "content_hash": content_hash,
+            "storage": "full",
+            "codec": blob.codec,
+        }
+
+    if await BackupBlob.filter(size=size).exists():
+        content_hash, _ = await asyncio.to_thread(hash_file, source)
+        async with _blob_lock:
+            blob = await BackupBlob.filter(content_hash=content_hash).first()
+            if blob and await asyncio.to_thread(Path(blob.blob_path).is_file):
+                return await _acquire(content_hash, Path(blob.blob_path), blob.codec)
+
+    tmp, content_hash, size, codec = await asyncio.to_thread(_copy_to_staging, source, backup_root, codec, level)
+    try:
+        async with _blob_lock:
+            blob = await BackupBlob.filter(content_hash=content_hash).first()
+            if blob and await asyncio.to_thread(Path(blob.blob_path).is_file):
+                await asyncio.to_thread(tmp.unlink, missing_ok=True)
+                return await _acquire(content_hash, Path(blob.blob_path), blob.codec)
+            dest = Path(blob.blob_path) if blob else blob_path(backup_root, content_hash)
+            if blob and blob.codec != codec:
+                # 记录还在但文件已丢失：用新写入的内容补回，并更正压缩方式
+                blob.codec = codec
+                await blob.save(update_fields=["codec"])
+            await asyncio.to_thread(_commit_staging, tmp, dest)
+            return await _acquire(content_hash, dest, codec)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+async def store_backup_content(
+    source: Path,
+    backup_root: Path,
+    mode: str = "full",
+    codec: str = "none",
+    level: int | None = None,
+) -> dict:
+    """
+    把 source 的内容写入（或复用）内容寻址存储，并为之登记一次引用。
+    返回创建 BackupRecord 所需的字段（file_anchor 除外），供单个或批量插入备份记录。
+
+    :param mode: full 为整文件备份；delta 为块级增量备份（适合频繁小改动的大文件）
+    :param codec: 整文件备份的压缩方式（none / zlib / lzma），见 utils.backup_codec
+    """
+    # 复制前记录源文件指纹；复制期间文件若被修改，下次增量备份会因修改时间不同而重新备份
+    st = await asyncio.to_thread(source.stat)
+    if mode == "delta":
+        fields = await _store_delta(source, backup_root)
+    else:
+        fields = await _store_full(source, backup_root, st.st_size, codec, level)
+    fields.update(
+        file_name=f"{source.stem}-{int(time.time())}{source.suffix}",
+        source_size=st.st_size,
+        source_mtime_ns=st.st_mtime_ns,
+    )
+    return fields
+
+
+async def create_backup(
+    anchor, source: Path, backup_root: Path, mode: str = "full", codec: str = "none", level: int | None = None
+):
+    """为资料锚点创建一条备份记录，内容写入（或复用）内容寻址的 blob。"""
+    from models import BackupRecord  # 延迟导入，避免循环引用
+
+    fields = await store_backup_content(source, backup_root, mode, codec, level)
+    return await BackupRecord.create(file_anchor=anchor, **fields)
+
+
+def _unlink_quietly(paths: list[Path]) -> None:
+    for path in paths:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            # 文件删除失败不影响记录删除，避免阻塞
+            pass
+
+
+async def _unlink_files(paths: list[Path]) -> None:
+    """删除文件；数量较多时分片交给线程池并行删除（网络盘上逐个删除延迟较高）。"""
+    if len(paths) <= UNLINK_SLICE_SIZE:
+        await asyncio.to_thread(_unlink_quietly, paths)
+        return
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=UNLINK_WORKERS, thread_name_prefix="backup-unlink") as executor:
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, _unlink_quietly, paths[start:start + UNLINK_SLICE_SIZE])
+                for start in range(0, len(paths), UNLINK_SLICE_SIZE)
+            )
+        )
+
+
+async def release_backups(records: list) -> None:
+    """
+    删除备份记录并释放其 blob 引用：引用归零的 blob 删除记录与文件；
+    旧版独立副本（无 blob）直接删除副本文件。
+    增量备份的块清单被删除时，同时释放清单中各块的引用，归零的块一并删除。
+    """
+    from collections import Counter, defaultdict
+
+    from tortoise.expressions import F
+    from tortoise.transactions import in_transaction
+
+    from utils.backup_chunks import load_manifest
+
+    from models import BackupBlob, BackupChunk, BackupRecord  # 延迟导入，避免循环引用
+
+    if not records:
+        return
+    released = Counter(rec.blob_id for rec in records if rec.blob_id)
+    manifests = {rec.blob_id for rec in records if rec.blob_id and rec.storage == "delta"}
+    orphans = [Path(rec.backup_path).expanduser() for rec in records if not rec.blob_id]
+
+    record_ids = [rec.id for rec in records if rec.id is not None]  # 未入库的记录只需归还引用
+    by_count: dict[int, list[int]] = defaultdict(list)
+    for blob_id, count in released.items():
+        by_count[count].append(blob_id)
+    blob_ids = list(released)
+
+    async with _blob_lock:
+        async with in_transaction():
+            for start in range(0, len(record_ids), SQL_CHUNK_SIZE):
+                await BackupRecord.filter(id__in=record_ids[start:start + SQL_CHUNK_SIZE]).delete()
+            # 释放数相同的 blob 合并为一条 UPDATE
+            for count, ids in by_count.items():
+                for start in range(0, len(ids), SQL_CHUNK_SIZE):
+                    await BackupBlob.filter(id__in=ids[start:start + SQL_CHUNK_SIZE]).update(
+                        ref_count=F("ref_count") - count
+                    )
+            dead: list = []
+            for start in range(0, len(blob_ids), SQL_CHUNK_SIZE):
+                dead.extend(
+                    await BackupBlob.filter(
+                        id__in=blob_ids[start:start + SQL_CHUNK_SIZE], ref_count__lte=0
+                    ).values_list("id", "blob_path")
+                )
+            for start in range(0, len(dead), SQL_CHUNK_SIZE):
+                await BackupBlob.filter(id__in=[bid for bid, _ in dead[start:start + SQL_CHUNK_SIZE]]).delete()
+
+            chunk_refs: Counter = Counter()
+            for bid, path in dead:
+                if bid not in manifests:
+                    continue
+                try:
+                    manifest = await asyncio.to_thread(load_manifest, Path(path))
+                except (OSError, ValueError):
+                    continue
+                chunk_refs.update({content_hash for content_hash, _ in manifest["chunks"]})
+            dead_chunks: list = []
+            if chunk_refs:
+                await _adjust_chunk_refs({content_hash: -n for content_hash, n in chunk_refs.items()})
+                hashes = list(chunk_refs)
+                for start in range(0, len(hashes), SQL_CHUNK_SIZE):
+                    dead_chunks.extend(
+                        await BackupChunk.filter(
+                            content_hash__in=hashes[start:start + SQL_CHUNK_SIZE], ref_count__lte=0
+                        ).values_list("id", "chunk_path")
+                    )
+                for start in range(0, len(dead_chunks), SQL_CHUNK_SIZE):
+                    await BackupChunk.filter(
+                        id__in=[cid for cid, _ in dead_chunks[start:start + SQL_CHUNK_SIZE]]
+                    ).delete()
+        orphans.extend(Path(path) for _, path in dead)
+        orphans.extend(Path(path) for _, path in dead_chunks)
+        await _unlink_files(orphans)
+
+
+async def restore_backup_content(rec, dest: Path) -> tuple[str, int]:
+    """
+    把备份记录的内容写到 dest（校验哈希），返回 (内容哈希, 字节数)。
+    整文件备份直接流式复制 blob（压缩的边读边解压）；增量备份按块清单顺序流式拼接各块。
+    """
+    from utils.backup_chunks import load_manifest, restore_chunks
+
+    from models import BackupChunk  # 延迟导入，避免循环引用
+
+    source = Path(rec.backup_path).expanduser()
+    if rec.storage != "delta":
+        return await asyncio.to_thread(copy_file_hashed, source, dest, rec.content_hash, rec.codec)
+
+    manifest = await asyncio.to_thread(load_manifest, source)
+    hashes = list(dict.fromkeys(content_hash for content_hash, _ in manifest["chunks"]))
+    paths: dict[str, str] = {}
+    for start in range(0, len(hashes), SQL_CHUNK_SIZE):
+        paths.update(
+            await BackupChunk.filter(content_hash__in=hashes[start:start + SQL_CHUNK_SIZE]).values_list(
+                "content_hash", "chunk_path"
+            )
+        )
+    if len(paths) < len(hashes):
+        raise BackupIntegrityError("manifest references missing chunks")
+    ordered = [Path(paths[content_hash]) for content_hash, _ in manifest["chunks"]]
+    return await asyncio.to_thread(restore_chunks, ordered, dest, rec.content_hash)
@@ -0,0 +1,112 @@
+"""
+SQLite 连接参数基准：比较不同 PRAGMA 预设下的写入吞吐与并发读。
+
+在 app 目录下运行：
+
+    python -m utils.db_benchmark --writes 2000 --readers 4
+
+写入按 POST /anchors 的路径执行（创建锚点 + 绑定文件夹 + 写一条操作日志，各自单独提交），
+同时另开若干只读进程（模拟其他进程/工具读库）循环执行 /folders/{id}/anchors/page 的分页查询。
+"""
+import argparse
+import asyncio
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from tortoise import Tortoise
+
+from DBsettings import SQLITE_PROFILES, sqlite_connection
+
+# 额外对比：回滚日志模式（读写互斥）
+EXTRA_CASES = {"rollback_journal": {"journal_mode": "DELETE", "synchronous": "FULL"}}
+
+_PAGE_SQL = """
+SELECT a.id, a.name, a.path FROM fileanchor a
+JOIN fileanchor_virtualfolder fv ON fv.fileanchor_id = a.id
+WHERE fv.virtualfolder_id = ? AND a.id > ?
+ORDER BY a.id LIMIT 200
+"""
+
+
+def _reader(db_file: str, folder_id: int, stop, reads, errors) -> None:
+    conn = sqlite3.connect(db_file, timeout=0)
+    done = failed = 0
+    last_id = 0
+    while not stop.is_set():
+        try:
+            rows = conn.execute(_PAGE_SQL, (folder_id, last_id)).fetchall()
+            last_id = rows[-1][0] if len(rows) == 200 else 0
+            done += 1
+        except sqlite3.OperationalError:  # database is locked
+            failed += 1
+            time.sleep(0.001)
+    conn.close()
+    with reads.get_lock():
+        reads.value += done
+    with errors.get_lock():
+        errors.value += failed
+
+
+async def run_case(name: str, profile: str | None, pragmas: dict, writes: int, readers: int) -> dict:
+    from models import FileAnchor, OperatorLog, OperatorType, VirtualFolder  # 延迟导入，避免循环引用
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / "bench.db"
+        await Tortoise.init(
+            config={
+                "connections": {"default": sqlite_connection(str(db_file), profile, pragmas)},
+                "apps": {"models": {"models": ["models"], "default_connection": "default"}},
+            }
+        )
+        await Tortoise.generate_schemas()
+        folder = await VirtualFolder.create(name="bench")
+        op_type = await OperatorType.create(name="创建资料锚点")
+
+        stop = multiprocessing.Event()
+        reads = multiprocessing.Value("q", 0)
+        errors = multiprocessing.Value("q", 0)
+        processes = [
+            multiprocessing.Process(target=_reader, args=(str(db_file), folder.id, stop, reads, errors), daemon=True)
+            for _ in range(readers)
+        ]
+        for process in processes:
+            process.start()
+
+        start = time.perf_counter()
+        for i in range(writes):
+            anchor = await FileAnchor.create(name=f"file-{i}", path=f"C:/bench/file-{i}.txt")
+            await anchor.virtual_folders.add(folder)
+            await OperatorLog.create(operator_type=op_type, result=f"anchor_id={anchor.id}")
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        for process in processes:
+            process.join()
+        await Tortoise.close_connections()
+
+    return {
+        "case": name,
+        "writes_per_sec": round(writes / elapsed, 1),
+        "reads_per_sec": round(reads.value / elapsed, 1),
+        "read_errors": errors.value,
+    }
+
+
+async def main(writes: int, readers: int) -> None:
+    cases = [(name, name, {}) for name in SQLITE_PROFILES]
+    cases += [(name, "default", pragmas) for name, pragmas in EXTRA_CASES.items()]
+    print(f"{'case':<18}{'writes/s':>10}{'reads/s':>10}{'read errors':>13}")
+    for name, profile, pragmas in cases:
+        result = await run_case(name, profile, pragmas, writes, readers)
+        print(f"{result['case']:<18}{result['writes_per_sec']:>10}{result['reads_per_sec']:>10}{result['read_errors']:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite PRAGMA 预设基准")
+    parser.add_argument("--writes", type=int, default=2000, help="模拟 POST /anchors 的次数")
+    parser.add_argument("--readers", type=int, default=4, help="并发只读进程数")
+    args = parser.parse_args()
+    asyncio.run(main(args.writes, args.readers))
@@ -0,0 +1,171 @@
+"""
+后台任务登记：批量备份、目录导入等耗时操作以任务形式在后台运行，
+接口立即返回任务 ID，前端轮询进度、查看逐项结果，并可请求取消。
+
+任务只保存在内存中（服务重启后不保留），完成的任务保留最近 JOB_HISTORY_LIMIT 个。
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+JOB_HISTORY_LIMIT = 50
+STOP_TIMEOUT = 5.0  # 秒；服务退出时等待任务自行结束的时间
+
+_jobs: dict[str, "Job"] = {}
+
+
+class Job:
+    """
+    一个后台任务的状态。
+    status: pending / running / done / cancelled / failed
+    """
+
+    def __init__(self, kind: str, total: int = 0, params: dict | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "pending"
+        self.total = total
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.results: list[dict] = []
+        self.error: str | None = None
+        self.stats: dict = {}  # 任务类型特有的进度信息
+        self.created_at = datetime.now()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.cancel_requested = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "cancelled", "failed")
+
+    def add_result(self, status: str, **fields) -> None:
+        """记录单项结果并更新计数；status 为 done / failed / skipped。"""
+        self.processed += 1
+        if status == "done":
+            self.succeeded += 1
+        elif status == "failed":
+            self.failed += 1
+        else:
+            self.skipped += 1
+        self.results.append({"status": status, **fields})
+
+    def add_counts(self, status: str, count: int = 1) -> None:
+        """只累加计数、不保存逐项结果（用于数量很大的成功/跳过项，保持内存占用恒定）。"""
+        self.processed += count
+        if status == "done":
+            self.succeeded += count
+        elif status == "failed":
+            self.failed += count
+        else:
+            self.skipped += count
+
+    @property
+    def throughput(self) -> float:
+        """每秒处理的项数（自开始运行起）。"""
+        if self.started_at is None:
+            return 0.0
+        elapsed = ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+        return round(self.processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def snapshot(self, offset: int = 0, limit: int | None = 0) -> dict:
+        """
+        返回任务状态快照。
+
+        :param offset: 逐项结果的起始位置
+        :param limit: 返回的逐项结果数量；0 表示不返回，None 表示全部
+        """
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "throughput": self.throughput,
+            "stats": self.stats,
+            "cancel_requested": self.cancel_requested,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if limit != 0:
+            end = None if limit is None else offset + limit
+            data["results"] = self.results[offset:end]
+        return data
+
+
+async def _run(job: Job, runner: Callable[[Job], Awaitable[None]]) -> None:
+    job.status = "running"
+    job.started_at = datetime.now()
+    try:
+        await runner(job)
+        job.status = "cancelled" if job.cancel_requested else "done"
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        raise
+    except Exception as exc:  # noqa: BLE001 - 后台任务失败仅记录，不影响服务
+        job.status = "failed"
+        job.error = str(exc)
+        logger.warning("后台任务 {}({}) 失败: {}", job.kind, job.id, exc)
+    finally:
+        job.finished_at = datetime.now()
+
+
+def _prune_history() -> None:
+    finished = [job for job in _jobs.values() if job.finished]
+    for job in finished[:max(0, len(finished) - JOB_HISTORY_LIMIT)]:
+        _jobs.pop(job.id, None)
+
+
+def start_job(job: Job, runner: Callable[[Job], Awaitable[None]]) -> Job:
+    """登记任务并在后台开始执行 runner(job)。runner 应在处理各项之间检查 job.cancel_requested。"""
+    _prune_history()
+    _jobs[job.id] = job
+    job._task = asyncio.create_task(_run(job, runner))
+    return job
+
+
+def get_job(job_id: str, kind: str | None = None) -> Job | None:
+    job = _jobs.get(job_id)
+    if job is None or (kind is not None and job.kind != kind):
+        return None
+    return job
+
+
+def list_jobs(kind: str | None = None) -> list[Job]:
+    """按创建时间倒序返回任务。"""
+    jobs = [job for job in _jobs.values() if kind is None or job.kind == kind]
+    return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+
+def cancel_job(job: Job) -> bool:
+    """请求取消任务（协作式：当前项处理完后停止）。:return: 任务是否仍在运行"""
+    if job.finished:
+        return False
+    job.cancel_requested = True
+    return True
+
+
+async def stop_jobs() -> None:
+    """请求取消全部进行中的任务并等待其结束，超时后强制取消（在 lifespan 退出时调用）。"""
+    tasks = [job._task for job in _jobs.values() if job._task is not None and not job._task.done()]
+    if not tasks:
+        return
+    for job in _jobs.values():
+        cancel_job(job)
+    _, pending = await asyncio.wait(tasks, timeout=STOP_TIMEOUT)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
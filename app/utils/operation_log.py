@@ -1,7 +1,138 @@
 """
 操作日志写入工具，避免在各路由重复创建 OperatorLog。
+
+日志默认经由后台写入器异步批量落库：log_operation 仅入队即返回，写入任务每隔
+FLUSH_INTERVAL 秒或攒满 FLUSH_BATCH_SIZE 条时以一次 bulk_create 写入。
+写入器未启动时（如脚本直接调用）退化为同步写入。
 """
+import asyncio
+
 from loguru import logger
+from tortoise import timezone
+
+FLUSH_INTERVAL = 0.5  # 秒
+FLUSH_BATCH_SIZE = 200
+
+# OperatorType 名称 -> ID 缓存。操作类型在启动时由 ensure_operator_types 初始化，运行期基本不变，
+# 缓存后写日志只需一次 INSERT；操作类型增删改时通过模型信号失效。
+_type_id_cache: dict[str, int] = {}
+_signals_registered = False
+
+
+def invalidate_operator_type_cache() -> None:
+    """清空操作类型缓存，下次写日志时重新加载。"""
+    _type_id_cache.clear()
+
+
+def _register_invalidation_signals() -> None:
+    global _signals_registered
+    if _signals_registered:
+        return
+
+    from tortoise.signals import post_delete, post_save
+
+    from models import OperatorType
+
+    @post_save(OperatorType)
+    async def _on_type_saved(*_args, **_kwargs) -> None:
+        invalidate_operator_type_cache()
+
+    @post_delete(OperatorType)
+    async def _on_type_deleted(*_args, **_kwargs) -> None:
+        invalidate_operator_type_cache()
+
+    _signals_registered = True
+
+
+async def warm_operator_type_cache() -> None:
+    """一次性加载全部操作类型到缓存（在 lifespan 中 ensure_operator_types 之后调用）。"""
+    from models import OperatorType
+
+    _register_invalidation_signals()
+    rows = await OperatorType.all().values_list("name", "id")
+    _type_id_cache.clear()
+    _type_id_cache.update(rows)
+
+
+async def _resolve_type_id(type_name: str) -> int | None:
+    type_id = _type_id_cache.get(type_name)
+    if type_id is not None:
+        return type_id
+
+    from models import OperatorType
+
+    opt_type = await OperatorType.get_or_none(name=type_name)
+    if not opt_type:
+        return None
+    _type_id_cache[type_name] = opt_type.id
+    return opt_type.id
+
+
+_queue: asyncio.Queue | None = None
+_writer_task: asyncio.Task | None = None
+_STOP = object()  # 写入器停止标记
+
+
+async def _flush(batch: list) -> None:
+    from models import OperatorLog
+    from tortoise.transactions import in_transaction
+
+    if not batch:
+        return
+    try:
+        async with in_transaction():
+            await OperatorLog.bulk_create(
+                [OperatorLog(operator_type_id=type_id, result=result, time=time) for type_id, result, time in batch]
+            )
+    except Exception as exc:  # noqa: BLE001 - 日志失败不阻断主流程
+        invalidate_operator_type_cache()
+        logger.warning("批量写入操作日志失败（{} 条）: {}", len(batch), exc)
+
+
+async def _writer_loop(queue: asyncio.Queue) -> None:
+    """后台写入循环：等待首条日志，再在 FLUSH_INTERVAL 内尽量攒批后写入；收到停止标记后写完并退出。"""
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        item = await queue.get()
+        if item is _STOP:
+            break
+        batch = [item]
+        deadline = loop.time() + FLUSH_INTERVAL
+        while len(batch) < FLUSH_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        await _flush(batch)
+
+
+async def start_log_writer() -> None:
+    """启动后台日志写入任务（在 lifespan 中调用）。"""
+    global _queue, _writer_task
+    if _writer_task is not None:
+        return
+    _queue = asyncio.Queue()
+    _writer_task = asyncio.create_task(_writer_loop(_queue))
+
+
+async def stop_log_writer() -> None:
+    """停止后台写入任务，并把队列中剩余的日志写完（在 lifespan 退出时调用）。"""
+    global _queue, _writer_task
+    if _writer_task is None:
+        return
+    task, queue = _writer_task, _queue
+    # 先摘除队列，之后的日志直接同步写入；停止标记之前入队的日志都会被写完
+    _writer_task, _queue = None, None
+    queue.put_nowait(_STOP)
+    await task
 
 
 async def log_operation(type_name: str, result: str) -> None:
@@ -11,12 +142,16 @@ async def log_operation(type_name: str, result: str) -> None:
     :param result: 本次操作的结果描述（可简要包含 ID/路径等信息）
     """
     # 延迟导入以避免循环依赖
-    from models import OperatorLog, OperatorType
+    from models import OperatorLog
 
     try:
-        opt_type = await OperatorType.get_or_none(name=type_name)
-        if not opt_type:
+        type_id = await _resolve_type_id(type_name)
+        if type_id is None:
+            return
+        if _queue is not None:
+            _queue.put_nowait((type_id, result, timezone.now()))
             return
-        await OperatorLog.create(operator_type=opt_type, result=result)
+        await OperatorLog.create(operator_type_id=type_id, result=result)
     except Exception as exc:  # noqa: BLE001 - 日志失败不阻断主流程
+        invalidate_operator_type_cache()
         logger.warning("记录操作日志失败: {} => {}", type_name, exc)
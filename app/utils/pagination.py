@@ -0,0 +1,28 @@
+"""
+游标（keyset）分页辅助函数：游标对前端不透明，内容为上一页最后一条记录的排序键。
+"""
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(key: dict[str, Any]) -> str:
+    """将排序键编码为 URL 安全的不透明游标字符串。"""
+    raw = json.dumps(key, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    解析游标字符串。
+
+    :raises ValueError: 游标格式不合法
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:  # noqa: BLE001 - 统一转为 ValueError
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(data, dict):
+        raise ValueError("invalid cursor")
+    return data
@@ -0,0 +1,215 @@
+"""
+资料锚点路径有效性检测：在工作线程中并发 stat，避免阻塞事件循环；结果批量写回数据库。
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+DEFAULT_PARALLELISM = 8
+DEFAULT_TIMEOUT = 5.0  # 秒；单个路径在该时间内无结果则视为未知（如网络盘不可达）
+UPDATE_CHUNK_SIZE = 900
+
+
+def load_check_options() -> tuple[int, float]:
+    """
+    读取 settings.toml 中的检测参数，缺省时使用默认值：
+
+        [path_check]
+        parallelism = 8
+        timeout = 5.0
+    """
+    from utils.settings import load_settings
+
+    options = load_settings().get("path_check", {})
+    try:
+        parallelism = max(1, int(options.get("parallelism", DEFAULT_PARALLELISM)))
+        timeout = max(0.1, float(options.get("timeout", DEFAULT_TIMEOUT)))
+    except (TypeError, ValueError, AttributeError):
+        return DEFAULT_PARALLELISM, DEFAULT_TIMEOUT
+    return parallelism, timeout
+
+
+def _normalize(path: str) -> str:
+    return os.path.normpath(os.path.expanduser(path))
+
+
+def _read_mount_points() -> list[str]:
+    """读取当前挂载点（Linux 的 /proc/self/mounts），按长度降序；不可用时返回空列表。"""
+    try:
+        with open("/proc/self/mounts", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    points = set()
+    for line in lines:
+        fields = line.split()
+        if len(fields) >= 2:
+            # 挂载表中空格等字符以八进制转义（如 \040）
+            points.add(re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), fields[1]))
+    return sorted(points, key=len, reverse=True)
+
+
+def _root_of(path: str, mount_points: list[str]) -> str:
+    """
+    路径所在的“不可达判定单元”：Windows 为盘符或网络共享（\\\\server\\share）；
+    POSIX 为所在挂载点，挂载点为根目录时退化为一级目录前缀（如 /mnt、/media）。
+    """
+    anchor = Path(path).anchor
+    if anchor and anchor != os.sep:
+        return anchor
+    for point in mount_points:
+        if point != os.sep and (path == point or path.startswith(point.rstrip(os.sep) + os.sep)):
+            return point
+    parts = path.split(os.sep)
+    return os.sep + parts[1] if len(parts) > 2 and parts[1] else path
+
+
+def _probe_group(parent: str, paths: list[str], report) -> None:
+    """在工作线程中检测同一目录下的一组路径；父目录不存在时无需逐个 stat。"""
+    if not os.path.isdir(parent):
+        for path in paths:
+            report(path, False)
+        return
+    for path in paths:
+        report(path, os.path.exists(path))
+
+
+async def _first_of(*events: asyncio.Event) -> None:
+    """等待任一事件被置位。"""
+    waiters = [asyncio.ensure_future(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+async def check_paths(
+    paths: list[str],
+    parallelism: int = DEFAULT_PARALLELISM,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, bool | None]:
+    """
+    并发检测路径是否存在。
+
+    - 按父目录分组，每组在独立的守护线程中顺序检测，同目录的元数据可复用系统缓存；
+    - 同时检测的组数不超过 parallelism；每个路径需在 timeout 秒内给出结果，否则该组剩余路径记为 None（未知），
+      并立即归还并发名额（卡住的线程留在后台，不再等待）；
+    - 某组超时后，同一盘符/网络共享/挂载点下尚未开始的组直接记为未知；
+    - 排队等待名额时若长时间没有任何组取得进展，同样记为未知，整体用时有上限。
+
+    :return: 原始路径 -> True/False/None
+    """
+    results: dict[str, bool | None] = {}
+    if not paths:
+        return results
+
+    normalized: dict[str, list[str]] = defaultdict(list)
+    for raw in dict.fromkeys(paths):
+        normalized[_normalize(raw)].append(raw)
+
+    groups: dict[str, list[str]] = defaultdict(list)
+    for path in normalized:
+        groups[os.path.dirname(path)].append(path)
+
+    loop = asyncio.get_running_loop()
+    mount_points = _read_mount_points() if os.sep == "/" else []
+    slots = asyncio.Semaphore(max(1, parallelism))
+    unreachable_roots: set[str] = set()
+    last_progress = time.monotonic()
+
+    def _set(path: str, value: bool | None) -> None:
+        for raw in normalized[path]:
+            results[raw] = value
+
+    async def _acquire() -> bool:
+        """
+        等待并发名额。持有名额的组最迟在无进展 timeout 秒后归还，
+        因此连续 2 * timeout 秒没有任何进展或归还时视为异常并放弃（兜底，保证整体用时有上限）。
+        """
+        while True:
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout)
+                return True
+            except TimeoutError:
+                if time.monotonic() - last_progress >= 2 * timeout:
+                    return False
+
+    async def run_group(parent: str, group: list[str]) -> None:
+        nonlocal last_progress
+        root = _root_of(parent, mount_points)
+        if root in unreachable_roots or not await _acquire():
+            for path in group:
+                _set(path, None)
+            return
+        try:
+            if root in unreachable_roots:
+                for path in group:
+                    _set(path, None)
+                return
+
+            progress = asyncio.Event()
+            finished = asyncio.Event()
+            done: dict[str, bool] = {}
+
+            def notify(event: asyncio.Event) -> None:
+                try:
+                    loop.call_soon_threadsafe(event.set)
+                except RuntimeError:  # 超时放弃后事件循环可能已关闭
+                    pass
+
+            def report(path: str, exists: bool) -> None:
+                done[path] = exists
+                notify(progress)
+
+            def probe() -> None:
+                try:
+                    _probe_group(parent, group, report)
+                finally:
+                    notify(finished)
+
+            # 守护线程：卡在不可达路径上的线程不会阻止进程退出
+            threading.Thread(target=probe, name="path-check", daemon=True).start()
+
+            while not finished.is_set():
+                progress.clear()
+                try:
+                    await asyncio.wait_for(_first_of(progress, finished), timeout)
+                except TimeoutError:
+                    unreachable_roots.add(root)
+                    break
+                last_progress = time.monotonic()
+
+            for path in group:
+                _set(path, done.get(path))
+        finally:
+            last_progress = time.monotonic()
+            slots.release()
+
+    await asyncio.gather(*(run_group(parent, group) for parent, group in groups.items()))
+    return results
+
+
+async def apply_validity(current: dict[int, bool], checked: dict[int, bool | None]) -> tuple[list[int], list[int]]:
+    """
+    根据检测结果批量更新 FileAnchor.is_valid：变为有效、变为无效各一条 UPDATE ... WHERE id IN (...)。
+    结果为 None（未知）的锚点保持原状态。
+
+    :param current: 锚点 ID -> 当前 is_valid
+    :param checked: 锚点 ID -> 检测结果
+    :return: (新变为有效的 ID 列表, 新变为无效的 ID 列表)
+    """
+    from models import FileAnchor  # 延迟导入，避免循环引用
+
+    became_valid = [aid for aid, ok in checked.items() if ok is True and not current.get(aid)]
+    became_invalid = [aid for aid, ok in checked.items() if ok is False and current.get(aid)]
+
+    for ids, value in ((became_valid, True), (became_invalid, False)):
+        # 超大列表分批，避免超出 SQLite 单条语句的参数上限
+        for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+            await FileAnchor.filter(id__in=ids[start:start + UPDATE_CHUNK_SIZE]).update(is_valid=value)
+    return became_valid, became_invalid
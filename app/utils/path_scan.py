@@ -0,0 +1,103 @@
+"""
+后台路径有效性全量扫描：服务启动后在后台按批次（id 游标）检测全部资料锚点，
+每批检测完立即批量写回 is_valid，并记录进度供 /check/scan 查询。
+"""
+import asyncio
+from datetime import datetime
+
+from loguru import logger
+
+from utils.path_check import apply_validity, check_paths, load_check_options
+
+SCAN_BATCH_SIZE = 2000
+
+_scan_task: asyncio.Task | None = None
+_progress: dict = {
+    "status": "idle",  # idle / running / done / failed
+    "total": 0,
+    "checked": 0,
+    "became_valid": 0,
+    "became_invalid": 0,
+    "unknown": 0,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+
+
+def get_scan_progress() -> dict:
+    """返回最近一次扫描的进度快照。"""
+    return dict(_progress)
+
+
+async def _run_scan(parallelism: int, timeout: float) -> None:
+    from models import FileAnchor  # 延迟导入，避免循环引用
+
+    try:
+        _progress["total"] = await FileAnchor.all().count()
+        last_id = 0
+        while True:
+            rows = await (
+                FileAnchor.filter(id__gt=last_id)
+                .order_by("id")
+                .limit(SCAN_BATCH_SIZE)
+                .values_list("id", "path", "is_valid")
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            checked = await check_paths([path for _, path, _ in rows], parallelism=parallelism, timeout=timeout)
+            current = {aid: bool(valid) for aid, _, valid in rows}
+            by_id = {aid: checked.get(path) for aid, path, _ in rows}
+            became_valid, became_invalid = await apply_validity(current, by_id)
+
+            _progress["checked"] += len(rows)
+            _progress["became_valid"] += len(became_valid)
+            _progress["became_invalid"] += len(became_invalid)
+            _progress["unknown"] += sum(1 for v in by_id.values() if v is None)
+        _progress["status"] = "done"
+    except Exception as exc:  # noqa: BLE001 - 后台任务失败仅记录，不影响服务
+        _progress.update(status="failed", error=str(exc))
+        logger.warning("路径有效性扫描失败: {}", exc)
+    finally:
+        _progress["finished_at"] = datetime.now()
+
+
+def start_validity_scan(parallelism: int | None = None, timeout: float | None = None) -> bool:
+    """
+    启动一次后台全量扫描；已有扫描在进行时不重复启动。
+    未指定并发数/超时时读取 settings.toml 中的 [path_check] 配置。
+
+    :return: 是否新启动了扫描
+    """
+    global _scan_task
+    if _scan_task is not None and not _scan_task.done():
+        return False
+    default_parallelism, default_timeout = load_check_options()
+    parallelism = parallelism or default_parallelism
+    timeout = timeout or default_timeout
+    _progress.update(
+        status="running",
+        total=0,
+        checked=0,
+        became_valid=0,
+        became_invalid=0,
+        unknown=0,
+        started_at=datetime.now(),
+        finished_at=None,
+        error=None,
+    )
+    _scan_task = asyncio.create_task(_run_scan(parallelism, timeout))
+    return True
+
+
+async def stop_validity_scan() -> None:
+    """取消进行中的扫描（在 lifespan 退出时调用）。"""
+    if _scan_task is None or _scan_task.done():
+        return
+    _scan_task.cancel()
+    try:
+        await _scan_task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,433 @@
+"""
+文件系统监听：实时维护 FileAnchor.is_valid，免去周期性全量扫描（可选功能）。
+
+- 按锚点路径的父目录建立监听，同一目录下的多个锚点共用一个监听；
+- Linux 下通过 ctypes 调用 inotify，无需第三方依赖；其他平台、inotify 不可用或
+  目录暂不存在时退化为轮询（每个目录仅 stat 一次，比较 mtime）；
+- 事件只标记“可能变化”的路径，攒批后交由 path_check 复核并批量写回；
+- 建立/撤销目录监听（inotify_add_watch、stat）可能在网络盘上阻塞，统一排队交给后台任务在守护线程中执行，
+  启动与请求处理只更新内存中的监听集合。
+
+ORM 的 save/delete 通过信号同步监听集合；绕过 ORM 的批量写入（批量导入、清空回收站等）
+需在提交后显式调用 get_watcher().watch_anchors(...) / unwatch_anchors(...)。
+
+在 settings.toml 中开启：
+
+    [path_watch]
+    enabled = true
+    poll_interval = 10
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from collections import defaultdict
+
+from loguru import logger
+
+from utils.path_check import apply_validity, check_paths, load_check_options
+
+DEFAULT_POLL_INTERVAL = 10.0  # 秒
+FLUSH_DELAY = 0.5  # 秒；事件攒批后再复核，合并短时间内的连续事件
+
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_WATCH_MASK = (
+    _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _normalize(path: str) -> str:
+    return os.path.normpath(os.path.expanduser(path))
+
+
+async def _in_daemon_thread(func, *args):
+    """
+    在守护线程中执行可能长时间阻塞的调用（如不可达网络盘上的 stat）。
+    与 asyncio.to_thread 不同，卡住的线程不会拖住事件循环关闭与进程退出。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _resolve(result, exc) -> None:
+        if future.done():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def _run() -> None:
+        result, exc = None, None
+        try:
+            result = func(*args)
+        except Exception as error:  # noqa: BLE001 - 交由调用方处理
+            exc = error
+        try:
+            loop.call_soon_threadsafe(_resolve, result, exc)
+        except RuntimeError:  # 事件循环已关闭
+            pass
+
+    threading.Thread(target=_run, name="path-watch-setup", daemon=True).start()
+    return await future
+
+
+class _Inotify:
+    """inotify 的最小封装：在独立线程中阻塞读取事件，通过回调上报。"""
+
+    def __init__(self, on_entry, on_dir_gone, on_overflow) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        self._wd_to_dir: dict[int, str] = {}
+        self._dir_to_wd: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._on_entry = on_entry
+        self._on_dir_gone = on_dir_gone
+        self._on_overflow = on_overflow
+        self._thread = threading.Thread(target=self._run, name="path-watch", daemon=True)
+        self._thread.start()
+
+    def add(self, directory: str) -> bool:
+        wd = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            return False
+        with self._lock:
+            self._wd_to_dir[wd] = directory
+            self._dir_to_wd[directory] = wd
+        return True
+
+    def remove(self, directory: str) -> None:
+        with self._lock:
+            wd = self._dir_to_wd.pop(directory, None)
+            if wd is not None:
+                self._wd_to_dir.pop(wd, None)
+        if wd is not None:
+            self._rm_watch(self._fd, wd)
+
+    def close(self) -> None:
+        os.write(self._wake_w, b"x")
+        self._thread.join(timeout=2)
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+    def _run(self) -> None:
+        while True:
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in readable:
+                return
+            data = os.read(self._fd, 64 * 1024)
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & _IN_Q_OVERFLOW:
+                    self._on_overflow()
+                    continue
+                with self._lock:
+                    directory = self._wd_to_dir.get(wd)
+                if directory is None:
+                    continue
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+                    with self._lock:
+                        self._wd_to_dir.pop(wd, None)
+                        self._dir_to_wd.pop(directory, None)
+                    self._on_dir_gone(directory)
+                elif name:
+                    self._on_entry(directory, os.fsdecode(name))
+
+
+class PathWatcher:
+    """按目录合并监听锚点路径，检测到变化后增量更新 is_valid。"""
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.poll_interval = poll_interval
+        # 目录 -> {文件名 -> {锚点 ID}}
+        self._dirs: dict[str, dict[str, set[int]]] = defaultdict(lambda: defaultdict(set))
+        self._anchor_paths: dict[int, str] = {}
+        self._polled: dict[str, int | None] = {}  # 轮询目录 -> 上次 mtime（不存在为 None）
+        self._dirty: set[str] = set()
+        self._dirty_event = asyncio.Event()
+        self._pending_dirs: dict[str, bool] = {}  # 目录 -> 待建立(True)/撤销(False) 监听，后写覆盖先写
+        self._pending_event = asyncio.Event()
+        self._inotify: _Inotify | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "anchors": len(self._anchor_paths),
+            "directories": len(self._dirs),
+            "polled_directories": len(self._polled),
+            "pending_directories": len(self._pending_dirs),
+        }
+
+    async def start(self) -> None:
+        from models import FileAnchor  # 延迟导入，避免循环引用
+
+        self._loop = asyncio.get_running_loop()
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(self._threadsafe_entry, self._threadsafe_dir_gone, self._threadsafe_overflow)
+            except (OSError, AttributeError) as exc:
+                logger.info("inotify 不可用，改用轮询监听: {}", exc)
+
+        # 只登记监听集合，目录监听由后台任务在工作线程中建立，不阻塞服务启动
+        rows = await FileAnchor.all().values_list("id", "path")
+        self.watch_anchors(rows)
+        self._tasks = [
+            asyncio.create_task(self._setup_loop()),
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._poll_loop()),
+        ]
+        logger.info("路径监听已启动: {}", self.stats())
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    # ---------- 监听集合维护 ----------
+    def watch_anchors(self, anchors) -> None:
+        """新增/更新一批锚点的监听，anchors 为 (id, path) 序列。不做任何 I/O。"""
+        for anchor_id, path in anchors:
+            self.unwatch_anchor(anchor_id)
+            full = _normalize(path)
+            directory, name = os.path.split(full)
+            is_new_dir = directory not in self._dirs
+            self._dirs[directory][name].add(anchor_id)
+            self._anchor_paths[anchor_id] = full
+            if is_new_dir:
+                self._queue_dir(directory, True)
+
+    def unwatch_anchors(self, anchor_ids) -> None:
+        """撤销一批锚点的监听。不做任何 I/O。"""
+        for anchor_id in anchor_ids:
+            self.unwatch_anchor(anchor_id)
+
+    def unwatch_anchor(self, anchor_id: int) -> None:
+        full = self._anchor_paths.pop(anchor_id, None)
+        if full is None:
+            return
+        directory, name = os.path.split(full)
+        entries = self._dirs.get(directory)
+        if entries is None:
+            return
+        entries[name].discard(anchor_id)
+        if not entries[name]:
+            del entries[name]
+        if not entries:
+            del self._dirs[directory]
+            self._polled.pop(directory, None)
+            self._queue_dir(directory, False)
+
+    def _queue_dir(self, directory: str, watch: bool) -> None:
+        self._pending_dirs[directory] = watch
+        self._pending_event.set()
+
+    def _apply_dirs(self, changes: list[tuple[str, bool]]) -> list[tuple[str, bool, int | None]]:
+        """
+        在工作线程中建立/撤销目录监听（可能阻塞）。
+
+        :return: 新建立的目录 [(目录, 是否由 inotify 监听, 轮询用的 mtime)]
+        """
+        added = []
+        for directory, watch in changes:
+            if not watch:
+                if self._inotify:
+                    self._inotify.remove(directory)
+                continue
+            if self._inotify and self._inotify.add(directory):
+                added.append((directory, True, None))
+            else:
+                added.append((directory, False, self._dir_mtime(directory)))
+        return added
+
+    async def _setup_loop(self) -> None:
+        while True:
+            await self._pending_event.wait()
+            self._pending_event.clear()
+            changes, self._pending_dirs = list(self._pending_dirs.items()), {}
+            try:
+                added = await _in_daemon_thread(self._apply_dirs, changes)
+            except Exception as exc:  # noqa: BLE001 - 监听失败不影响主流程
+                logger.warning("建立路径监听失败: {}", exc)
+                continue
+            for directory, by_inotify, mtime in added:
+                if directory not in self._dirs:
+                    # 建立期间目录下的锚点已全部移除
+                    if by_inotify:
+                        self._queue_dir(directory, False)
+                elif by_inotify:
+                    self._polled.pop(directory, None)
+                elif directory not in self._pending_dirs:
+                    self._polled[directory] = mtime
+
+    @staticmethod
+    def _dir_mtime(directory: str) -> int | None:
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+    # ---------- 事件处理 ----------
+    def _mark_dir(self, directory: str) -> None:
+        for name in self._dirs.get(directory, {}):
+            self._dirty.add(os.path.join(directory, name))
+        self._dirty_event.set()
+
+    def _threadsafe_entry(self, directory: str, name: str) -> None:
+        self._loop.call_soon_threadsafe(self._on_entry, directory, name)
+
+    def _threadsafe_dir_gone(self, directory: str) -> None:
+        self._loop.call_soon_threadsafe(self._on_dir_gone, directory)
+
+    def _threadsafe_overflow(self) -> None:
+        self._loop.call_soon_threadsafe(self._on_overflow)
+
+    def _on_entry(self, directory: str, name: str) -> None:
+        if name in self._dirs.get(directory, {}):
+            self._dirty.add(os.path.join(directory, name))
+            self._dirty_event.set()
+
+    def _on_dir_gone(self, directory: str) -> None:
+        # 目录被删除/移走：其下锚点全部复核，并改为轮询等待目录重新出现
+        if directory in self._dirs:
+            self._polled[directory] = None
+            self._mark_dir(directory)
+
+    def _on_overflow(self) -> None:
+        for directory in list(self._dirs):
+            self._mark_dir(directory)
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            directories = list(self._polled)
+            mtimes = await _in_daemon_thread(lambda: [self._dir_mtime(d) for d in directories])
+            for directory, mtime in zip(directories, mtimes):
+                if directory not in self._polled or self._polled[directory] == mtime:
+                    continue
+                self._polled[directory] = mtime
+                self._mark_dir(directory)
+                # 目录重新出现且 inotify 可用时，切回事件监听
+                if mtime is not None and self._inotify:
+                    self._queue_dir(directory, True)
+
+    async def _flush_loop(self) -> None:
+        from models import FileAnchor  # 延迟导入，避免循环引用
+
+        while True:
+            await self._dirty_event.wait()
+            await asyncio.sleep(FLUSH_DELAY)
+            self._dirty_event.clear()
+            dirty, self._dirty = self._dirty, set()
+
+            anchor_ids: dict[int, str] = {}
+            for full in dirty:
+                directory, name = os.path.split(full)
+                for anchor_id in self._dirs.get(directory, {}).get(name, ()):
+                    anchor_ids[anchor_id] = full
+            if not anchor_ids:
+                continue
+
+            try:
+                parallelism, timeout = load_check_options()
+                checked = await check_paths(list(set(anchor_ids.values())), parallelism=parallelism, timeout=timeout)
+                current = dict(await FileAnchor.filter(id__in=list(anchor_ids)).values_list("id", "is_valid"))
+                by_id = {aid: checked.get(full) for aid, full in anchor_ids.items() if aid in current}
+                await apply_validity({aid: bool(v) for aid, v in current.items()}, by_id)
+            except Exception as exc:  # noqa: BLE001 - 监听失败不影响主流程
+                logger.warning("路径监听更新失败: {}", exc)
+
+
+_watcher: PathWatcher | None = None
+_signals_registered = False
+
+
+def get_watcher() -> PathWatcher | None:
+    """返回运行中的监听器；未启用时为 None。"""
+    return _watcher
+
+
+def _register_anchor_signals() -> None:
+    global _signals_registered
+    if _signals_registered:
+        return
+
+    from tortoise.signals import post_delete, post_save
+
+    from models import FileAnchor
+
+    @post_save(FileAnchor)
+    async def _on_anchor_saved(_sender, instance, *_args, **_kwargs) -> None:
+        if _watcher is not None:
+            _watcher.watch_anchors([(instance.id, instance.path)])
+
+    @post_delete(FileAnchor)
+    async def _on_anchor_deleted(_sender, instance, *_args, **_kwargs) -> None:
+        if _watcher is not None:
+            _watcher.unwatch_anchor(instance.id)
+
+    _signals_registered = True
+
+
+async def start_path_watcher() -> None:
+    """按 settings.toml 的 [path_watch] 配置启动监听（在 lifespan 中调用）。"""
+    global _watcher
+    from utils.settings import load_settings
+
+    options = load_settings().get("path_watch", {})
+    if _watcher is not None or not isinstance(options, dict) or not options.get("enabled"):
+        return
+    try:
+        poll_interval = max(1.0, float(options.get("poll_interval", DEFAULT_POLL_INTERVAL)))
+    except (TypeError, ValueError):
+        poll_interval = DEFAULT_POLL_INTERVAL
+
+    watcher = PathWatcher(poll_interval=poll_interval)
+    await watcher.start()
+    _register_anchor_signals()
+    _watcher = watcher
+
+
+async def stop_path_watcher() -> None:
+    global _watcher
+    if _watcher is None:
+        return
+    watcher, _watcher = _watcher, None
+    await watcher.stop()
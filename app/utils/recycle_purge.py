@@ -0,0 +1,58 @@
+"""
+清空回收站：按块永久删除回收站中的资料锚点（后台任务）。
+
+每块 PURGE_CHUNK_SIZE 个锚点：在一个事务中整批删除中间表关联与锚点行（备份记录级联删除，
+标签 use_count 由触发器同步），提交后再释放这些备份的 blob 引用与文件。每块独立提交，取消或出错时已完成的块保留，
+剩余锚点仍在回收站中，可再次清空。
+"""
+import asyncio
+
+from tortoise import connections
+from tortoise.transactions import in_transaction
+
+from utils.anchor_bulk import release_anchor_tags
+from utils.jobs import Job
+from utils.path_watch import get_watcher
+
+PURGE_CHUNK_SIZE = 500
+FOLDER_THROUGH_TABLE = "fileanchor_virtualfolder"
+
+
+async def count_recycled(recycle_folder_id: int) -> int:
+    rows = await connections.get("default").execute_query_dict(
+        f'SELECT COUNT(*) AS "n" FROM "{FOLDER_THROUGH_TABLE}" WHERE "virtualfolder_id" = ?', [recycle_folder_id]
+    )
+    return rows[0]["n"]
+
+
+async def purge_recycle_bin(job: Job, recycle_folder_id: int, chunk_size: int = PURGE_CHUNK_SIZE) -> None:
+    """删除回收站中的全部锚点，job.total 为开始时回收站中的锚点数。"""
+    from models import BackupRecord  # 延迟导入，避免循环引用
+    from utils.backup_store import release_backups
+
+    conn = connections.get("default")
+    job.total = await count_recycled(recycle_folder_id)
+    while not job.cancel_requested:
+        rows = await conn.execute_query_dict(
+            f'SELECT "fileanchor_id" FROM "{FOLDER_THROUGH_TABLE}" WHERE "virtualfolder_id" = ? '
+            f'ORDER BY "fileanchor_id" LIMIT ?',
+            [recycle_folder_id, chunk_size],
+        )
+        if not rows:
+            break
+        ids = [row["fileanchor_id"] for row in rows]
+        placeholders = ",".join("?" for _ in ids)
+
+        async with in_transaction() as tx:
+            # 锚点删除会级联删除备份记录；在同一事务中取出这些记录，提交后再释放其 blob 引用
+            records = await BackupRecord.filter(file_anchor_id__in=ids).using_db(tx)
+            await release_anchor_tags(tx, ids)
+            await tx.execute_query(f'DELETE FROM "{FOLDER_THROUGH_TABLE}" WHERE "fileanchor_id" IN ({placeholders})', ids)
+            await tx.execute_query(f'DELETE FROM "fileanchor" WHERE "id" IN ({placeholders})', ids)
+        # 事务失败时记录与引用都保持原样；提交后记录已被级联删除，这里只归还引用、删除归零的 blob 文件
+        await asyncio.shield(release_backups(records))  # 提交后不因取消而漏还引用
+        # 直接 DELETE 不触发 ORM 信号，提交后显式撤销路径监听
+        watcher = get_watcher()
+        if watcher is not None:
+            watcher.unwatch_anchors(ids)
+        job.add_counts("done", len(ids))
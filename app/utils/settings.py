@@ -0,0 +1,23 @@
+"""
+读取用户设置（settings.toml）的共享辅助函数，路由与后台模块共用。
+"""
+import os
+import tomllib
+from pathlib import Path
+
+
+def settings_file() -> Path:
+    root = Path(os.getenv("LOCALAPPDATA", Path.home())) / "FAIO_Data"
+    root.mkdir(parents=True, exist_ok=True)
+    return root / "settings.toml"
+
+
+def load_settings() -> dict:
+    """读取设置文件；文件不存在或格式错误时返回空字典。"""
+    path = settings_file()
+    if not path.exists():
+        return {}
+    try:
+        return tomllib.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
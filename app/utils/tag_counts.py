@@ -0,0 +1,92 @@
+"""
+标签使用次数：Tag.use_count 由 fileanchor_tag 上的触发器在绑定/解绑时原子地加减，
+任何写入路径（ORM、批量 SQL、级联删除）都会同步，接口中不再手工维护。
+
+另有后台校准任务，用一条 GROUP BY 重新统计全部标签的实际绑定数并修正偏差
+（旧库升级前遗留的计数、直接改库等）。启动时执行一次，之后按设置定期执行：
+
+    [tags]
+    reconcile_interval = 3600   # 秒；0 表示只在启动时校准
+"""
+import asyncio
+
+from loguru import logger
+from tortoise import connections
+
+DEFAULT_RECONCILE_INTERVAL = 3600
+TAG_THROUGH_TABLE = "fileanchor_tag"
+
+_TRIGGER_DDL = f"""
+CREATE TRIGGER IF NOT EXISTS "{TAG_THROUGH_TABLE}_count_ai" AFTER INSERT ON "{TAG_THROUGH_TABLE}" BEGIN
+    UPDATE "tag" SET "use_count" = "use_count" + 1 WHERE "id" = new.tag_id;
+END;
+CREATE TRIGGER IF NOT EXISTS "{TAG_THROUGH_TABLE}_count_ad" AFTER DELETE ON "{TAG_THROUGH_TABLE}" BEGIN
+    UPDATE "tag" SET "use_count" = MAX("use_count" - 1, 0) WHERE "id" = old.tag_id;
+END;
+"""
+
+_RECONCILE_SQL = f"""
+UPDATE "tag" SET "use_count" = c."n"
+FROM (
+    SELECT t."id", COALESCE(g."n", 0) AS "n"
+    FROM "tag" t
+    LEFT JOIN (SELECT "tag_id", COUNT(*) AS "n" FROM "{TAG_THROUGH_TABLE}" GROUP BY "tag_id") g ON g."tag_id" = t."id"
+) AS c
+WHERE "tag"."id" = c."id" AND "tag"."use_count" <> c."n"
+"""
+
+_reconcile_task: asyncio.Task | None = None
+
+
+async def ensure_tag_count_triggers() -> None:
+    """创建维护 use_count 的触发器（已存在则跳过）。"""
+    await connections.get("default").execute_script(_TRIGGER_DDL)
+
+
+async def reconcile_tag_counts() -> int:
+    """按实际绑定数重算全部标签的 use_count，返回被修正的标签数。"""
+    corrected, _ = await connections.get("default").execute_query(_RECONCILE_SQL)
+    if corrected:
+        logger.info("已校准 {} 个标签的使用次数", corrected)
+    return corrected
+
+
+def load_reconcile_interval() -> int:
+    """读取 settings.toml 中的 [tags] reconcile_interval（秒），格式错误时使用默认值。"""
+    from utils.settings import load_settings
+
+    options = load_settings().get("tags", {})
+    try:
+        return max(0, int(options.get("reconcile_interval", DEFAULT_RECONCILE_INTERVAL)))
+    except (TypeError, ValueError, AttributeError):
+        return DEFAULT_RECONCILE_INTERVAL
+
+
+async def _run_reconciler(interval: int) -> None:
+    while True:
+        try:
+            await reconcile_tag_counts()
+        except Exception as exc:  # noqa: BLE001 - 校准失败仅记录，下次再试
+            logger.warning("标签使用次数校准失败: {}", exc)
+        if not interval:
+            return
+        await asyncio.sleep(interval)
+
+
+def start_tag_reconciler() -> None:
+    """在后台启动校准任务（启动时立即校准一次），已在运行时不重复启动。"""
+    global _reconcile_task
+    if _reconcile_task is not None and not _reconcile_task.done():
+        return
+    _reconcile_task = asyncio.create_task(_run_reconciler(load_reconcile_interval()))
+
+
+async def stop_tag_reconciler() -> None:
+    """停止校准任务（在 lifespan 退出时调用）。"""
+    if _reconcile_task is None or _reconcile_task.done():
+        return
+    _reconcile_task.cancel()
+    try:
+        await _reconcile_task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,84 @@
+"""
+按标签组合筛选资料锚点：一条 GROUP BY / HAVING 查询完成多标签交集，查询次数与标签数量无关。
+
+    all_tag_ids   必须同时带有的标签（AND）
+    any_tag_ids   至少带有其一的标签（OR）
+    none_tag_ids  不能带有的标签（NOT）
+
+有正向标签时从 fileanchor_tag 的 (tag_id, fileanchor_id) 索引出发，只扫描这些标签的关联行，
+按锚点分组后用 HAVING 计数判断是否满足 AND / OR；只有 NOT 条件时从文件夹关联表出发。
+文件夹与 NOT 条件均为走唯一索引的 EXISTS 子查询。结果按锚点 ID 升序，支持 keyset 分页。
+"""
+from tortoise import connections
+
+FOLDER_THROUGH_TABLE = "fileanchor_virtualfolder"
+TAG_THROUGH_TABLE = "fileanchor_tag"
+
+
+def _placeholders(values: list) -> str:
+    return ",".join("?" for _ in values)
+
+
+async def filter_anchor_ids_by_tags(
+    folder_id: int,
+    all_tag_ids: list[int] | None = None,
+    any_tag_ids: list[int] | None = None,
+    none_tag_ids: list[int] | None = None,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[int]:
+    """
+    返回文件夹内满足标签条件的锚点 ID（升序）。
+
+    :param after_id: 只返回 ID 大于该值的锚点（游标分页）
+    :param limit: 最多返回条数；None 表示不限
+    """
+    all_ids = list(dict.fromkeys(all_tag_ids or []))
+    any_ids = list(dict.fromkeys(any_tag_ids or []))
+    none_ids = list(dict.fromkeys(none_tag_ids or []))
+    positive = list(dict.fromkeys(all_ids + any_ids))
+
+    if positive:
+        key = "ft.fileanchor_id"
+        sql = f'SELECT {key} AS id FROM "{TAG_THROUGH_TABLE}" ft WHERE ft.tag_id IN ({_placeholders(positive)})'
+        params: list = list(positive)
+    else:
+        key = "fv.fileanchor_id"
+        sql = f'SELECT {key} AS id FROM "{FOLDER_THROUGH_TABLE}" fv WHERE fv.virtualfolder_id = ?'
+        params = [folder_id]
+
+    if after_id is not None:
+        sql += f" AND {key} > ?"
+        params.append(after_id)
+    if positive:
+        sql += (
+            f' AND EXISTS (SELECT 1 FROM "{FOLDER_THROUGH_TABLE}" fv '
+            f"WHERE fv.fileanchor_id = {key} AND fv.virtualfolder_id = ?)"
+        )
+        params.append(folder_id)
+    if none_ids:
+        sql += (
+            f' AND NOT EXISTS (SELECT 1 FROM "{TAG_THROUGH_TABLE}" nt '
+            f"WHERE nt.fileanchor_id = {key} AND nt.tag_id IN ({_placeholders(none_ids)}))"
+        )
+        params.extend(none_ids)
+
+    if positive:
+        sql += f" GROUP BY {key}"
+        having: list[str] = []
+        if all_ids:
+            having.append(f"SUM(ft.tag_id IN ({_placeholders(all_ids)})) = ?")
+            params.extend(all_ids)
+            params.append(len(all_ids))
+        if any_ids:
+            having.append(f"SUM(ft.tag_id IN ({_placeholders(any_ids)})) > 0")
+            params.extend(any_ids)
+        sql += " HAVING " + " AND ".join(having)
+
+    sql += f" ORDER BY {key}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    rows = await connections.get("default").execute_query_dict(sql, params)
+    return [row["id"] for row in rows]
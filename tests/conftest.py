@@ -0,0 +1,51 @@
+"""
+测试公共设置：把 app 目录加入导入路径（与 main.py 的运行方式一致），并提供内存数据库辅助函数。
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def run_with_db(coro_factory):
+    """在内存 SQLite 上建表（含升级脚本中的索引与触发器）后运行 coro_factory()，结束时关闭连接。"""
+    from tortoise import Tortoise
+
+    from db_init import ensure_system_virtual_folders, upgrade_schema
+
+    async def _main():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["models"]})
+        try:
+            await upgrade_schema()
+            await ensure_system_virtual_folders()
+            return await coro_factory()
+        finally:
+            await Tortoise.close_connections()
+
+    return asyncio.run(_main())
+
+
+@pytest.fixture
+def stalled_stat(monkeypatch):
+    """
+    伪造卡住的 os.stat：以 /stalled 开头的路径一直阻塞（模拟不可达的网络盘），其余路径照常。
+    测试结束时放行被卡住的线程。
+    """
+    release = threading.Event()
+    real_stat = os.stat
+
+    def fake_stat(path, *args, **kwargs):
+        if os.fspath(path).startswith("/stalled"):
+            release.wait()
+            raise FileNotFoundError(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", fake_stat)
+    yield release
+    release.set()
@@ -0,0 +1,30 @@
+from conftest import run_with_db
+
+
+def test_short_terms_rank_name_matches_first():
+    from models import FileAnchor
+    from utils.anchor_search import search_anchor_ids
+
+    async def scenario():
+        in_name = await FileAnchor.create(name="合同.pdf", path="/docs/a.pdf")
+        in_path = await FileAnchor.create(name="b.pdf", path="/合同/b.pdf")
+        await FileAnchor.create(name="c.pdf", path="/docs/c.pdf")
+        return [in_name.id, in_path.id], await search_anchor_ids("合同")
+
+    expected, found = run_with_db(scenario)
+
+    assert found == expected
+
+
+def test_long_and_short_terms_combine():
+    from models import FileAnchor
+    from utils.anchor_search import search_anchor_ids
+
+    async def scenario():
+        hit = await FileAnchor.create(name="采购合同2024.pdf", path="/docs/a.pdf")
+        await FileAnchor.create(name="采购合同.pdf", path="/docs/b.pdf")
+        return hit.id, await search_anchor_ids("2024 合同")
+
+    hit, found = run_with_db(scenario)
+
+    assert found == [hit]
@@ -0,0 +1,59 @@
+from conftest import run_with_db
+from utils.backup_jobs import run_backup_job
+from utils.jobs import Job
+
+
+def test_records_that_fail_to_insert_release_their_blob_refs(tmp_path):
+    from models import BackupBlob, BackupRecord, FileAnchor
+
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    kept = source_dir / "kept.txt"
+    kept.write_text("kept")
+    orphan = source_dir / "orphan.txt"
+    orphan.write_text("orphan")
+    backup_root = tmp_path / "backups"
+
+    async def scenario():
+        anchor = await FileAnchor.create(name="kept.txt", path=str(kept))
+        job = Job("backup")
+        # 9999 号锚点不存在（相当于任务期间被清空回收站删除），其备份记录插入时外键失败
+        await run_backup_job(job, [(anchor.id, str(kept)), (9999, str(orphan))], backup_root)
+        blobs = await BackupBlob.all().values_list("ref_count", flat=True)
+        return job, await BackupRecord.all().count(), blobs
+
+    job, records, blob_refs = run_with_db(scenario)
+
+    assert (job.succeeded, job.failed) == (1, 1)
+    assert [r["anchor_id"] for r in job.results if r["status"] == "failed"] == [9999]
+    assert records == 1
+    # 失败记录登记的引用已归还，引用归零的 blob 已删除
+    assert blob_refs == [1]
+    assert len([p for p in backup_root.rglob("*") if p.is_file()]) == 1
+
+
+def test_same_content_refreshes_stored_fingerprint(tmp_path):
+    import os
+
+    from models import FileAnchor
+
+    source = tmp_path / "doc.txt"
+    source.write_text("same")
+    backup_root = tmp_path / "backups"
+
+    async def scenario():
+        anchor = await FileAnchor.create(name="doc.txt", path=str(source))
+        items = [(anchor.id, str(source))]
+        await run_backup_job(Job("backup"), items, backup_root)
+
+        st = source.stat()
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        reasons = []
+        for _ in range(2):
+            job = Job("backup")
+            await run_backup_job(job, items, backup_root, incremental=True, verify_hash=True)
+            reasons.append(job.results[0].get("reason"))
+        return reasons
+
+    # 第一次比较内容后更新指纹，第二次按 stat 直接跳过
+    assert run_with_db(scenario) == ["same_content", "unchanged"]
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from conftest import run_with_db
+from utils.backup_retention import RetentionPolicy, find_expired_backups
+
+
+def test_keep_last_expires_older_backups_per_anchor():
+    from models import BackupRecord, FileAnchor
+
+    async def scenario():
+        now = datetime.now()
+        ids: dict[int, list[int]] = {}
+        for name in ("a", "b"):
+            anchor = await FileAnchor.create(name=name, path=f"/docs/{name}")
+            ids[anchor.id] = []
+            for i in range(3):
+                rec = await BackupRecord.create(
+                    file_anchor=anchor, backup_path=f"/b/{name}{i}", backup_time=now - timedelta(hours=i)
+                )
+                ids[anchor.id].append(rec.id)
+        return ids, await find_expired_backups(RetentionPolicy(keep_last=2))
+
+    ids, expired = run_with_db(scenario)
+
+    # 每个锚点只保留最近两次，最旧的一次过期
+    assert expired == sorted(records[2] for records in ids.values())
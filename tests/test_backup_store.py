@@ -0,0 +1,37 @@
+import hashlib
+import lzma
+import tracemalloc
+import zlib
+
+import pytest
+
+from utils.backup_store import COPY_CHUNK_SIZE, copy_file_hashed
+
+RAW_SIZE = 64 * 1024 * 1024
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_restore_decompresses_in_bounded_chunks(tmp_path, codec):
+    # 64 MiB 全零数据压缩后只有几十 KB，一次读取即可展开成整个文件
+    encoder = zlib.compressobj(9) if codec == "zlib" else lzma.LZMACompressor(preset=1)
+    blob = tmp_path / "blob"
+    chunk = bytes(1024 * 1024)
+    with open(blob, "wb") as f:
+        for _ in range(RAW_SIZE // len(chunk)):
+            f.write(encoder.compress(chunk))
+        f.write(encoder.flush())
+    expected = hashlib.sha256()
+    for _ in range(RAW_SIZE // len(chunk)):
+        expected.update(chunk)
+
+    tracemalloc.start()
+    try:
+        content_hash, size = copy_file_hashed(blob, tmp_path / "restored", expected.hexdigest(), codec)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert (content_hash, size) == (expected.hexdigest(), RAW_SIZE)
+    assert (tmp_path / "restored").stat().st_size == RAW_SIZE
+    # 读缓冲、一段输出与 zlib 的 unconsumed_tail 各至多一个块，与文件大小无关
+    assert peak < 6 * COPY_CHUNK_SIZE
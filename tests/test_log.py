@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from conftest import run_with_db
+
+
+def test_type_filtered_estimate_is_capped_sql_count(monkeypatch):
+    from tortoise import connections
+
+    from models import OperatorLog, OperatorType
+    from routers import log
+
+    monkeypatch.setattr(log, "COUNT_ESTIMATE_CAP", 5)
+
+    async def scenario():
+        rare = await OperatorType.create(name="rare")
+        common = await OperatorType.create(name="common")
+        await OperatorLog.bulk_create(
+            [OperatorLog(operator_type=common, result=str(i)) for i in range(20)]
+            + [OperatorLog(operator_type=rare, result=str(i)) for i in range(3)]
+        )
+        since = datetime.now() - timedelta(days=1)
+        plan = await connections.get("default").execute_query_dict(
+            'EXPLAIN QUERY PLAN SELECT 1 FROM "operatorlog" WHERE "operator_type_id" = ? AND "time" >= ?', [rare.id, since]
+        )
+        return (
+            await log._estimate_total(rare.id, None, None),
+            await log._estimate_total(common.id, None, None),
+            await log._estimate_total(rare.id, since, None),
+            await log._estimate_total(rare.id, datetime.now() + timedelta(days=1), None),
+            " ".join(row["detail"] for row in plan),
+        )
+
+    rare_count, common_count, since_count, future_count, plan = run_with_db(scenario)
+
+    assert (rare_count, common_count, since_count, future_count) == (3, 5, 3, 0)
+    assert "idx_operatorlog_type_time" in plan
+
+
+def test_untyped_estimate_reads_single_rows_by_index():
+    from tortoise import connections
+
+    from models import OperatorLog, OperatorType
+    from routers import log
+
+    async def scenario():
+        op_type = await OperatorType.create(name="any")
+        await OperatorLog.bulk_create([OperatorLog(operator_type=op_type, result=str(i)) for i in range(10)])
+        since = datetime.now() - timedelta(days=1)
+        until = datetime.now() + timedelta(days=1)
+        conn = connections.get("default")
+        plans = []
+        for bounds in ((None, None), (since, None), (None, until), (since, until)):
+            for sql, args in log._id_span_queries(*bounds):
+                rows = await conn.execute_query_dict(f"EXPLAIN QUERY PLAN {sql}", args)
+                plans.append(" ".join(row["detail"] for row in rows))
+        return (
+            await log._estimate_total(None, None, None),
+            await log._estimate_total(None, since, until),
+            await log._estimate_total(None, until, None),
+            plans,
+        )
+
+    total, ranged, future, plans = run_with_db(scenario)
+
+    assert (total, ranged, future) == (10, 10, 0)
+    for plan in plans:
+        assert "SEARCH" in plan and "SCAN" not in plan and "TEMP B-TREE" not in plan, plan
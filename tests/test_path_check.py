@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from conftest import run_with_db
+from utils.path_check import _root_of, check_paths
+
+
+def test_check_paths_reports_existing_and_missing(tmp_path):
+    present = tmp_path / "a.txt"
+    present.write_text("x")
+    missing = tmp_path / "b.txt"
+    gone_dir = tmp_path / "gone" / "c.txt"
+
+    results = asyncio.run(check_paths([str(present), str(missing), str(gone_dir)], parallelism=2, timeout=2))
+
+    assert results == {str(present): True, str(missing): False, str(gone_dir): False}
+
+
+def test_stalled_directories_return_unknown_without_blocking(stalled_stat, tmp_path):
+    present = tmp_path / "ok.txt"
+    present.write_text("x")
+    # 6 个卡住的目录分布在不同挂载前缀上，并发数只有 2
+    stalled = [f"/stalled{i}/share/file.txt" for i in range(6)]
+
+    started = time.monotonic()
+    results = asyncio.run(check_paths(stalled + [str(present)], parallelism=2, timeout=0.3))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 3
+    assert all(results[path] is None for path in stalled)
+    assert results[str(present)] is True
+
+
+def test_stall_marks_same_root_unknown(stalled_stat):
+    stalled = [f"/stalled/dir{i}/file.txt" for i in range(20)]
+
+    started = time.monotonic()
+    results = asyncio.run(check_paths(stalled, parallelism=2, timeout=0.3))
+
+    # 同一前缀下首批超时后，其余目录不再逐个等待
+    assert time.monotonic() - started < 1.5
+    assert all(results[path] is None for path in stalled)
+
+
+def test_root_of_uses_mount_point_or_top_level_prefix():
+    mounts = ["/mnt/nas", "/"]
+    assert _root_of("/mnt/nas/docs/a", mounts) == "/mnt/nas"
+    assert _root_of("/mnt/other/a", mounts) == "/mnt"
+    assert _root_of("/home/user/a", []) == "/home"
+
+
+def test_check_folder_anchors_returns_unknown_for_stalled_paths(stalled_stat, tmp_path):
+    from models import FileAnchor, VirtualFolder
+    from routers.checkData import check_folder_anchors
+
+    present = tmp_path / "ok.txt"
+    present.write_text("x")
+
+    async def scenario():
+        folder = await VirtualFolder.get(name="全部资料")
+        paths = [f"/stalled{i}/share/file.txt" for i in range(6)] + [str(present)]
+        for path in paths:
+            anchor = await FileAnchor.create(name=path.rsplit("/", 1)[-1], path=path, is_valid=True)
+            await anchor.virtual_folders.add(folder)
+        started = time.monotonic()
+        response = await check_folder_anchors(folder.id, parallelism=2, timeout=0.3)
+        return response, time.monotonic() - started
+
+    response, elapsed = run_with_db(scenario)
+
+    assert elapsed < 3
+    statuses = {item["path"]: item["status"] for item in response["anchors"]}
+    assert statuses.pop(str(present)) == "valid"
+    assert set(statuses.values()) == {"unknown"}
+    # 未知状态不改写 is_valid
+    assert all(item["is_valid"] for item in response["anchors"])
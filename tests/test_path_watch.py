@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from conftest import run_with_db
+from utils import path_watch
+from utils.path_watch import PathWatcher
+
+
+async def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        await asyncio.sleep(0.02)
+
+
+def test_start_does_not_block_on_stalled_directories(stalled_stat, tmp_path):
+    from models import FileAnchor
+
+    present = tmp_path / "ok.txt"
+    present.write_text("x")
+
+    async def scenario():
+        for i in range(5):
+            await FileAnchor.create(name="a.txt", path=f"/stalled{i}/share/a.txt")
+        await FileAnchor.create(name="ok.txt", path=str(present))
+        watcher = PathWatcher(poll_interval=60)
+        started = time.monotonic()
+        await watcher.start()
+        elapsed = time.monotonic() - started
+        try:
+            # 正常目录的监听在后台建立完成，卡住的目录不影响其余目录
+            await _wait_for(lambda: str(tmp_path) not in watcher._pending_dirs and watcher.stats()["anchors"] == 6)
+            return elapsed, watcher.stats()
+        finally:
+            await watcher.stop()
+
+    elapsed, stats = run_with_db(scenario)
+
+    assert elapsed < 1
+    assert stats["anchors"] == 6
+
+
+def test_bulk_insert_and_purge_update_watch_set(monkeypatch, tmp_path):
+    from models import VirtualFolder
+    from routers.anchor import AnchorBulkCreate, create_anchors_bulk
+    from routers.anchor import AnchorBulkIds, move_anchors_to_recycle
+    from utils.jobs import Job
+    from utils.recycle_purge import purge_recycle_bin
+
+    async def scenario():
+        watcher = PathWatcher(poll_interval=60)
+        await watcher.start()
+        monkeypatch.setattr(path_watch, "_watcher", watcher)
+        try:
+            folder = await VirtualFolder.create(name="资料")
+            items = [{"name": f"{i}.txt", "path": str(tmp_path / f"{i}.txt")} for i in range(3)]
+            created = await create_anchors_bulk(AnchorBulkCreate(folder_id=folder.id, items=items))
+            watched_after_insert = watcher.stats()["anchors"]
+
+            await move_anchors_to_recycle(AnchorBulkIds(anchor_ids=[a.id for a in created]))
+            recycle = await VirtualFolder.get(name="回收站")
+            await purge_recycle_bin(Job("recycle_purge"), recycle.id)
+            return watched_after_insert, watcher.stats()["anchors"]
+        finally:
+            await watcher.stop()
+
+    assert run_with_db(scenario) == (3, 0)
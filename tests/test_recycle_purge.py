@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import run_with_db
+from utils import recycle_purge
+
+
+def _purge_with_backup(tmp_path, expect_error: type[Exception] | None = None):
+    """回收站中放一个带备份的锚点后清空，返回 (锚点数, 备份记录数, blob 引用计数, blob 文件数)。"""
+    from models import BackupBlob, BackupRecord, FileAnchor, VirtualFolder
+    from utils.backup_store import create_backup
+    from utils.jobs import Job
+
+    source = tmp_path / "doc.txt"
+    source.write_text("content")
+    backup_root = tmp_path / "backups"
+
+    async def scenario():
+        recycle = await VirtualFolder.get(name="回收站")
+        anchor = await FileAnchor.create(name="doc.txt", path=str(source))
+        await anchor.virtual_folders.add(recycle)
+        await create_backup(anchor, source, backup_root)
+
+        if expect_error is None:
+            await recycle_purge.purge_recycle_bin(Job("recycle_purge"), recycle.id)
+        else:
+            with pytest.raises(expect_error):
+                await recycle_purge.purge_recycle_bin(Job("recycle_purge"), recycle.id)
+
+        return (
+            await FileAnchor.all().count(),
+            await BackupRecord.all().count(),
+            await BackupBlob.all().values_list("ref_count", flat=True),
+            len([p for p in backup_root.rglob("*") if p.is_file()]),
+        )
+
+    return run_with_db(scenario)
+
+
+def test_purge_releases_backups_after_commit(tmp_path):
+    assert _purge_with_backup(tmp_path) == (0, 0, [], 0)
+
+
+def test_failed_purge_chunk_keeps_backup_refs(tmp_path, monkeypatch):
+    async def broken(*_args, **_kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(recycle_purge, "release_anchor_tags", broken)
+    # 删除锚点的事务失败：锚点、备份记录、blob 引用与文件全部保持原样
+    assert _purge_with_backup(tmp_path, expect_error=RuntimeError) == (1, 1, [1], 1)
@@ -0,0 +1,35 @@
+import sqlite3
+
+from conftest import run_with_db
+
+
+def test_tag_listing_stays_under_old_sqlite_variable_limit():
+    from tortoise import connections
+    from tortoise.transactions import in_transaction
+
+    from models import FileAnchor, Tag, VirtualFolder
+    from routers.tag import list_anchors_by_tags, list_anchors_by_tags_page
+    from utils.anchor_bulk import add_anchor_tags
+    from utils.anchor_import import insert_anchors
+
+    async def scenario():
+        folder = await VirtualFolder.create(name="资料")
+        tag = await Tag.create(name="论文")
+        anchors = [FileAnchor(name=f"{i}.pdf", path=f"/docs/{i}.pdf") for i in range(1500)]
+        async with in_transaction() as conn:
+            ids = await insert_anchors(conn, anchors, [folder.id])
+            await add_anchor_tags(conn, ids, [tag.id])
+
+        # 模拟旧版 SQLite（SQLITE_MAX_VARIABLE_NUMBER=999）
+        raw = connections.get("default")._connection
+        await raw._execute(raw._conn.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        listed = await list_anchors_by_tags(folder_id=folder.id, tag_names=["论文"], any_tag_names=None, exclude_tag_names=None)
+        page = await list_anchors_by_tags_page(
+            folder_id=folder.id, tag_names=["论文"], any_tag_names=None, exclude_tag_names=None, limit=1000, cursor=None
+        )
+        return ids, [a.id for a in listed], [a.id for a in page.items]
+
+    ids, listed, page = run_with_db(scenario)
+
+    assert listed == ids
+    assert page == ids[:1000]